@@ -8,6 +8,10 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import sqlite3
+import os
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 import matplotlib.pyplot as plt
 import numpy as np
@@ -25,59 +29,181 @@ st.set_page_config(
 st.title("Dragon Pokémon TCG Analytics Dashboard")
 st.markdown("---")
 
-# Conexión a la base de datos
-def get_db_connection():
-    """Abre una conexión nueva a la BD cada vez."""
-    db_path = "pokemon_cards.db"
-    if Path(db_path).exists():
-        return sqlite3.connect(db_path)
-    else:
-        st.error(f"Base de datos no encontrada: {db_path}")
-        return None
-# Cargar datos desde la base de datos
-@st.cache_data(ttl=3600)  # Cache por 1 hora
-def load_data():
-    """Carga todos los datos de la base de datos"""
-    conn = get_db_connection()
-    if conn is None:
-        return None
-    
-    # Cargar datos de la vista de detalles
-    query = """
-    SELECT 
-        card_id,
-        pokemon_name,
-        card_type,
-        price,
-        rarity_level,
-        is_rare,
-        expansion_name,
-        generation
-    FROM vw_card_details
+DB_PATH = "pokemon_cards.db"
+
+# Conexiones de solo lectura compartidas por todas las sesiones
+POOL_SIZE = 4
+READ_PRAGMAS = {
+    "mmap_size": 268435456,  # 256 MB mapeados en memoria
+    "cache_size": -65536     # ~64 MB de caché de páginas por conexión
+}
+
+class ConnectionPool:
     """
+    Conexiones de solo lectura a una versión del archivo de la BD.
+    Al cerrarse el pool se cierran las conexiones libres, y las que estaban
+    prestadas se cierran al devolverlas.
+    """
+    
+    def __init__(self, file_id):
+        self.file_id = file_id
+        self.closed = False
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        uri = f"{Path(DB_PATH).resolve().as_uri()}?mode=ro"
+        for _ in range(POOL_SIZE):
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            for name, value in READ_PRAGMAS.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+            self._idle.put(conn)
     
-    df = pd.read_sql_query(query, conn)
-    conn.close()
+    def get(self):
+        return self._idle.get()
+    
+    def put(self, conn):
+        with self._lock:
+            if self.closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
     
-    return df
+    def close(self):
+        with self._lock:
+            self.closed = True
+            while not self._idle.empty():
+                self._idle.get_nowait().close()
+
+@st.cache_resource
+def get_pool_registry():
+    """Pool vigente compartido por todas las sesiones"""
+    return {"lock": threading.Lock(), "pool": None}
+
+def get_connection_pool(file_id):
+    """
+    Devuelve el pool de conexiones de solo lectura a la BD.
+    file_id identifica el archivo (dispositivo, inodo): cuando el ETL lo
+    reemplaza con os.replace se crea un pool nuevo, porque las conexiones
+    abiertas seguirían leyendo el archivo anterior, y se cierra el anterior
+    para no dejar descriptores abiertos sobre el archivo eliminado.
+    """
+    registry = get_pool_registry()
+    with registry["lock"]:
+        pool = registry["pool"]
+        if pool is None or pool.file_id != file_id:
+            if pool is not None:
+                pool.close()
+            pool = registry["pool"] = ConnectionPool(file_id)
+        return pool
 
-@st.cache_data(ttl=3600)
-def load_statistics():
-    """Carga estadísticas desde la base de datos"""
-    conn = get_db_connection()
-    if conn is None:
+# Conexión a la base de datos
+@contextmanager
+def db_connection():
+    """Presta una conexión del pool compartido y la devuelve al terminar (None si no hay BD)"""
+    try:
+        stat = os.stat(DB_PATH)
+    except FileNotFoundError:
+        st.error(f"Base de datos no encontrada: {DB_PATH}")
+        yield None
+        return
+    
+    pool = get_connection_pool((stat.st_dev, stat.st_ino))
+    conn = pool.get()
+    try:
+        yield conn
+    finally:
+        pool.put(conn)
+
+def get_data_version():
+    """
+    Token de versión de los datos; las cachés se indexan por él y no caducan.
+    El ETL reemplaza el archivo completo con os.replace (cambia el inodo) y
+    registra cada ejecución exitosa en etl_metadata (cambia MAX(run_id)), así
+    que el token cambia en cuanto una carga se confirma; las ejecuciones
+    fallidas no invalidan las cachés. Las bases de datos sin ejecuciones
+    exitosas registradas usan la fecha de modificación del archivo.
+    """
+    try:
+        stat = os.stat(DB_PATH)
+    except FileNotFoundError:
         return None
     
-    # Cargar estadísticas
-    stats_query = "SELECT * FROM vw_statistics"
-    generation_query = "SELECT * FROM vw_prices_by_generation"
-    rarity_query = "SELECT * FROM vw_rarity_distribution"
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        try:
+            run_id = conn.execute(
+                "SELECT MAX(run_id) FROM etl_metadata WHERE status = 'success'"
+            ).fetchone()[0]
+        except sqlite3.OperationalError:
+            run_id = None
     
-    stats_df = pd.read_sql_query(stats_query, conn)
-    generation_df = pd.read_sql_query(generation_query, conn)
-    rarity_df = pd.read_sql_query(rarity_query, conn)
+    if run_id is None:
+        return (stat.st_ino, stat.st_mtime_ns)
+    return (stat.st_ino, run_id)
+
+# Cargar datos desde la base de datos
+@st.cache_data(max_entries=64)
+def run_query(query, params=(), data_version=None):
+    """Ejecuta una consulta parametrizada y devuelve un DataFrame
+    (la caché se indexa por consulta, parámetros y data_version)"""
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        return pd.read_sql_query(query, conn, params=list(params))
+
+@st.cache_data(max_entries=4)
+def load_filter_options(data_version=None):
+    """Carga las opciones de los filtros (valores distintos y rango de precios) sin leer las cartas"""
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        
+        def distinct(query):
+            return [row[0] for row in conn.execute(query)]
+        
+        price_min, price_max = conn.execute("SELECT MIN(price), MAX(price) FROM cards").fetchone()
+        options = {
+            'price_min': float(price_min or 0.0),
+            'price_max': float(price_max or 0.0),
+            'card_types': distinct("SELECT DISTINCT card_type FROM cards ORDER BY card_type"),
+            'rarity_levels': distinct(
+                "SELECT DISTINCT rarity_level FROM cards WHERE rarity_level IS NOT NULL ORDER BY rarity_level"
+            ),
+            # Solo generaciones y expansiones que tienen cartas
+            'generations': distinct(
+                """SELECT DISTINCT e.generation FROM expansions e
+                   WHERE e.generation IS NOT NULL
+                     AND EXISTS (SELECT 1 FROM cards c WHERE c.expansion_id = e.expansion_id)
+                   ORDER BY e.generation"""
+            ),
+            'expansions': distinct(
+                """SELECT e.name FROM expansions e
+                   WHERE EXISTS (SELECT 1 FROM cards c WHERE c.expansion_id = e.expansion_id)
+                   ORDER BY e.name"""
+            ),
+            # Las bases de datos anteriores no tienen rarity_score en la vista
+            'columns': [row[1] for row in conn.execute("PRAGMA table_info(vw_card_details)")]
+        }
     
-    conn.close()
+    return options
+
+@st.cache_data(max_entries=4)
+def load_statistics(data_version=None):
+    """Carga estadísticas desde la base de datos
+    Lee las tablas de resumen que el ETL recalcula en cada carga (unas pocas
+    filas), sin agrupar la tabla cards completa."""
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        
+        # Cargar estadísticas precalculadas
+        stats_query = "SELECT * FROM vw_statistics"
+        generation_query = "SELECT * FROM vw_prices_by_generation ORDER BY avg_price DESC"
+        rarity_query = "SELECT * FROM vw_rarity_distribution ORDER BY count DESC"
+        
+        stats_df = pd.read_sql_query(stats_query, conn)
+        generation_df = pd.read_sql_query(generation_query, conn)
+        rarity_df = pd.read_sql_query(rarity_query, conn)
     
     return {
         'stats': stats_df.iloc[0].to_dict() if not stats_df.empty else {},
@@ -85,27 +211,330 @@ def load_statistics():
         'rarity_distribution': rarity_df
     }
 
+# Número de barras del histograma de precios
+HISTOGRAM_BINS = 50
+
+@st.cache_data(max_entries=64)
+def load_price_distribution(where_clause="", where_params=(), data_version=None, bins=HISTOGRAM_BINS):
+    """
+    Calcula en SQL el histograma y el resumen de cinco números de los precios filtrados
+    El navegador recibe `bins` barras y una caja precalculada en lugar de
+    todos los precios, así el tamaño del gráfico no depende del número de cartas.
+    
+    Returns:
+        Diccionario con count, mean, min, max, q1, median, q3, lower_fence,
+        upper_fence y el histograma (DataFrame bin_start, bin_end, count), o
+        None si no hay BD o ninguna carta cumple los filtros
+    """
+    def with_condition(condition):
+        return f"{where_clause} AND {condition}" if where_clause else f"WHERE {condition}"
+    
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        
+        count, mean, price_min, price_max = conn.execute(
+            f"SELECT COUNT(*), AVG(price), MIN(price), MAX(price) FROM vw_card_details {where_clause}",
+            where_params
+        ).fetchone()
+        if not count:
+            return None
+        
+        # Cuantiles con interpolación lineal (como pandas.describe), leyendo
+        # solo las dos filas que rodean cada posición
+        def quantile(q):
+            position = q * (count - 1)
+            offset = int(position)
+            values = [row[0] for row in conn.execute(
+                f"SELECT price FROM vw_card_details {where_clause} ORDER BY price LIMIT 2 OFFSET ?",
+                where_params + (offset,)
+            )]
+            upper = values[1] if len(values) > 1 else values[0]
+            return values[0] + (upper - values[0]) * (position - offset)
+        
+        q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+        
+        # Bigotes de la caja: valores extremos dentro de 1.5 veces el rango intercuartílico
+        iqr = q3 - q1
+        lower_fence = conn.execute(
+            f"SELECT MIN(price) FROM vw_card_details {with_condition('price >= ?')}",
+            where_params + (q1 - 1.5 * iqr,)
+        ).fetchone()[0]
+        upper_fence = conn.execute(
+            f"SELECT MAX(price) FROM vw_card_details {with_condition('price <= ?')}",
+            where_params + (q3 + 1.5 * iqr,)
+        ).fetchone()[0]
+        
+        # Histograma: barras de igual ancho entre el mínimo y el máximo
+        width = (price_max - price_min) / bins or 1.0
+        bin_counts = pd.read_sql_query(
+            f"""SELECT MIN(CAST((price - ?) / ? AS INTEGER), ?) AS bin, COUNT(*) AS count
+                FROM vw_card_details {where_clause}
+                GROUP BY bin""",
+            conn, params=[price_min, width, bins - 1] + list(where_params)
+        )
+    
+    histogram = pd.DataFrame({'bin': range(bins)}).merge(bin_counts, on='bin', how='left')
+    histogram['count'] = histogram['count'].fillna(0).astype('int64')
+    histogram['bin_start'] = price_min + histogram['bin'] * width
+    histogram['bin_end'] = histogram['bin_start'] + width
+    
+    return {
+        'count': count, 'mean': mean, 'min': price_min, 'max': price_max,
+        'q1': q1, 'median': median, 'q3': q3,
+        'lower_fence': lower_fence, 'upper_fence': upper_fence,
+        'histogram': histogram[['bin_start', 'bin_end', 'count']]
+    }
+
+@st.cache_data(max_entries=64)
+def load_price_boxes_by_type(where_clause="", where_params=(), data_version=None):
+    """
+    Calcula en SQL la caja de precios (cinco números y media) de cada tipo de carta
+    Los cuartiles usan interpolación lineal como load_price_distribution; el
+    navegador recibe una fila por tipo en lugar de todos los precios.
+    
+    Returns:
+        DataFrame con card_type, count, mean, q1, median, q3, lower_fence y
+        upper_fence (vacío si ninguna carta cumple los filtros)
+    """
+    def quantile(q):
+        # Valores en las posiciones que rodean q * (n - 1), interpolados linealmente
+        position = f"{q} * (n - 1)"
+        lower = f"MAX(CASE WHEN rn = CAST({position} AS INTEGER) THEN price END)"
+        upper = f"MAX(CASE WHEN rn = MIN(CAST({position} AS INTEGER) + 1, n - 1) THEN price END)"
+        return f"{lower} + ({upper} - {lower}) * ({position} - CAST({position} AS INTEGER))"
+    
+    query = f"""
+        WITH ranked AS (
+            SELECT card_type, price,
+                   ROW_NUMBER() OVER (PARTITION BY card_type ORDER BY price) - 1 AS rn,
+                   COUNT(*) OVER (PARTITION BY card_type) AS n
+            FROM vw_card_details {where_clause}
+        ),
+        boxes AS (
+            SELECT card_type, n AS count, AVG(price) AS mean,
+                   {quantile(0.25)} AS q1, {quantile(0.5)} AS median, {quantile(0.75)} AS q3
+            FROM ranked
+            GROUP BY card_type
+        )
+        SELECT b.card_type, b.count, b.mean, b.q1, b.median, b.q3,
+               MIN(CASE WHEN r.price >= b.q1 - 1.5 * (b.q3 - b.q1) THEN r.price END) AS lower_fence,
+               MAX(CASE WHEN r.price <= b.q3 + 1.5 * (b.q3 - b.q1) THEN r.price END) AS upper_fence
+        FROM boxes b
+        JOIN ranked r ON r.card_type = b.card_type
+        GROUP BY b.card_type
+        ORDER BY b.card_type
+    """
+    with db_connection() as conn:
+        if conn is None:
+            return pd.DataFrame()
+        return pd.read_sql_query(query, conn, params=where_params)
+
+# Gráficos de dispersión: máximo de puntos enviados al navegador, máximo de
+# precios atípicos que se conservan siempre en la muestra y barras de precio
+# de la rejilla de densidad
+SCATTER_POINT_LIMIT = 5000
+SCATTER_OUTLIER_LIMIT = 1000
+DENSITY_PRICE_BINS = 40
+
+@st.cache_data(max_entries=32)
+def load_rarity_scatter(where_clause="", where_params=(), data_version=None, distribution=None,
+                        limit=SCATTER_POINT_LIMIT):
+    """
+    Carga los puntos del gráfico precio vs score de rareza
+    Hasta `limit` cartas se devuelven todas. Por encima se toma una muestra
+    estratificada por (generación, score de rareza), proporcional al tamaño
+    de cada estrato y determinista (orden pseudoaleatorio por card_id), que
+    conserva siempre los SCATTER_OUTLIER_LIMIT precios atípicos más extremos
+    (fuera de los bigotes de la caja de load_price_distribution). La muestra,
+    atípicos incluidos, nunca pasa de `limit` puntos.
+    
+    Returns:
+        Tupla (DataFrame, modo 'points' o 'sample', total de cartas filtradas)
+    """
+    columns = "rarity_score, price, generation, pokemon_name, card_type, expansion_name"
+    total = distribution['count'] if distribution else 0
+    
+    with db_connection() as conn:
+        if conn is None:
+            return None, None, 0
+        
+        if total <= limit:
+            points = pd.read_sql_query(
+                f"SELECT {columns} FROM vw_card_details {where_clause}", conn, params=list(where_params)
+            )
+            return points, 'points', total
+        
+        # Los atípicos se reservan primero (como mucho la mitad del presupuesto);
+        # el resto se reparte entre los estratos
+        def with_condition(condition):
+            return f"{where_clause} AND {condition}" if where_clause else f"WHERE {condition}"
+        
+        outlier_rows = conn.execute(
+            f"SELECT COUNT(*) FROM vw_card_details {with_condition('(price > ? OR price < ?)')}",
+            list(where_params) + [distribution['upper_fence'], distribution['lower_fence']]
+        ).fetchone()[0]
+        outliers = min(outlier_rows, SCATTER_OUTLIER_LIMIT, limit // 2)
+        fraction = (limit - outliers) / max(total - outliers, 1)
+        
+        # Cada estrato aporta al menos una fila, así que la muestra puede pasarse
+        # del presupuesto; el LIMIT final recorta primero las filas de menor
+        # prioridad dentro de su estrato, conservando la proporción entre estratos
+        points = pd.read_sql_query(
+            f"""WITH ranked AS (
+                    SELECT {columns},
+                        ROW_NUMBER() OVER (
+                            PARTITION BY generation, rarity_score
+                            ORDER BY (card_id * 2654435761) % 4294967296
+                        ) AS stratum_rank,
+                        COUNT(*) OVER (PARTITION BY generation, rarity_score) AS stratum_rows,
+                        ROW_NUMBER() OVER (ORDER BY ABS(price - ?) DESC) AS extreme_rank
+                    FROM vw_card_details {where_clause}
+                ),
+                flagged AS (
+                    SELECT *, (price > ? OR price < ?) AND extreme_rank <= ? AS is_outlier
+                    FROM ranked
+                )
+                SELECT {columns} FROM flagged
+                WHERE is_outlier OR stratum_rank <= MAX(1, CAST(stratum_rows * ? AS INTEGER))
+                ORDER BY is_outlier DESC, CAST(stratum_rank AS REAL) / stratum_rows
+                LIMIT ?""",
+            conn,
+            params=[distribution['median']] + list(where_params) + [
+                distribution['upper_fence'], distribution['lower_fence'], outliers, fraction, limit
+            ]
+        )
+    return points, 'sample', total
+
+@st.cache_data(max_entries=32)
+def load_rarity_regression(where_clause="", where_params=(), data_version=None):
+    """
+    Ajusta precio ~ score de rareza por mínimos cuadrados a partir de los
+    estadísticos suficientes (n, Σx, Σy, Σxy, Σx², Σy²) calculados en SQL
+    
+    Returns:
+        Diccionario con n, slope, intercept, r, x_min y x_max, o None si no
+        hay cartas o todas tienen el mismo score
+    """
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        n, sum_x, sum_y, sum_xy, sum_xx, sum_yy, x_min, x_max = conn.execute(
+            f"""SELECT COUNT(*), SUM(rarity_score), SUM(price), SUM(rarity_score * price),
+                       SUM(rarity_score * rarity_score), SUM(price * price),
+                       MIN(rarity_score), MAX(rarity_score)
+                FROM vw_card_details {where_clause}""",
+            where_params
+        ).fetchone()
+    
+    if not n:
+        return None
+    sxx = n * sum_xx - sum_x * sum_x
+    syy = n * sum_yy - sum_y * sum_y
+    sxy = n * sum_xy - sum_x * sum_y
+    if sxx <= 0:
+        return None
+    slope = sxy / sxx
+    return {
+        'n': n,
+        'slope': slope,
+        'intercept': (sum_y - slope * sum_x) / n,
+        'r': sxy / np.sqrt(sxx * syy) if syy > 0 else 0.0,
+        'x_min': x_min,
+        'x_max': x_max
+    }
+
+@st.cache_data(max_entries=32)
+def load_rarity_density(where_clause="", where_params=(), data_version=None, distribution=None,
+                        bins=DENSITY_PRICE_BINS):
+    """
+    Agrupa en SQL las cartas en una rejilla (score de rareza x barra de precio)
+    
+    Returns:
+        DataFrame con una fila por barra de precio (índice: centro de la
+        barra), una columna por score de rareza y el número de cartas (NaN
+        en las celdas vacías)
+    """
+    width = (distribution['max'] - distribution['min']) / bins or 1.0
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        density = pd.read_sql_query(
+            f"""SELECT rarity_score, MIN(CAST((price - ?) / ? AS INTEGER), ?) AS bin, COUNT(*) AS count
+                FROM vw_card_details {where_clause}
+                GROUP BY rarity_score, bin""",
+            conn, params=[distribution['min'], width, bins - 1] + list(where_params)
+        )
+    grid = density.pivot(index='bin', columns='rarity_score', values='count').reindex(range(bins))
+    grid.index = distribution['min'] + (grid.index + 0.5) * width
+    return grid
+
+def build_filter_clause(price_range, card_types, generation, rarity_levels, expansion, search, options):
+    """
+    Traduce el estado de los filtros a una cláusula WHERE parametrizada sobre vw_card_details
+    
+    Los filtros que no restringen nada (todas las opciones marcadas o el rango
+    de precios completo) se omiten, así SQLite solo usa idx_cards_price,
+    idx_cards_type o idx_cards_rarity cuando el filtro es selectivo.
+    
+    Returns:
+        Tupla (cláusula WHERE o cadena vacía, parámetros)
+    """
+    conditions = []
+    params = []
+    
+    if price_range[0] > options['price_min'] or price_range[1] < options['price_max']:
+        conditions.append("price BETWEEN ? AND ?")
+        params.extend(price_range)
+    
+    if card_types and set(card_types) != set(options['card_types']):
+        conditions.append(f"card_type IN ({', '.join('?' * len(card_types))})")
+        params.extend(card_types)
+    
+    if generation != "Todas":
+        conditions.append("generation = ?")
+        params.append(generation)
+    
+    if rarity_levels and set(rarity_levels) != set(options['rarity_levels']):
+        conditions.append(f"rarity_level IN ({', '.join('?' * len(rarity_levels))})")
+        params.extend(rarity_levels)
+    
+    if expansion != "Todas":
+        conditions.append("expansion_name = ?")
+        params.append(expansion)
+    
+    if search:
+        # Búsqueda literal sin distinguir mayúsculas (se escapan los comodines de LIKE)
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        conditions.append("pokemon_name LIKE ? ESCAPE '\\'")
+        params.append(f"%{escaped}%")
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, tuple(params)
+
 # Sidebar para filtros
 st.sidebar.header("🎛️ Filtros y Controles")
 
-# Cargar datos
-df = load_data()
-if df is None:
+# Cargar opciones de filtros (se recargan en cuanto el ETL confirma una carga nueva)
+data_version = get_data_version()
+options = load_filter_options(data_version)
+if options is None:
     st.stop()
 
-stats_data = load_statistics()
+stats_data = load_statistics(data_version)
+has_rarity_score = 'rarity_score' in options['columns']
 
 # Filtro 1: Rango de precios
 price_range = st.sidebar.slider(
     " Rango de Precios (£)",
-    min_value=float(df['price'].min()),
-    max_value=float(df['price'].max()),
-    value=(0.0, float(df['price'].max())),
+    min_value=options['price_min'],
+    max_value=options['price_max'],
+    value=(0.0, options['price_max']),
     step=0.5
 )
 
 # Filtro 2: Tipo de carta
-card_types = sorted(df['card_type'].unique())
+card_types = options['card_types']
 selected_types = st.sidebar.multiselect(
     "Tipo de Carta",
     options=card_types,
@@ -113,7 +542,7 @@ selected_types = st.sidebar.multiselect(
 )
 
 # Filtro 3: Generación
-generations = sorted(df['generation'].unique())
+generations = options['generations']
 selected_generation = st.sidebar.selectbox(
     "Generación",
     options=["Todas"] + list(generations),
@@ -121,7 +550,7 @@ selected_generation = st.sidebar.selectbox(
 )
 
 # Filtro 4: Nivel de rareza
-rarity_levels = sorted(df['rarity_level'].unique())
+rarity_levels = options['rarity_levels']
 selected_rarity = st.sidebar.multiselect(
     " Nivel de Rareza",
     options=rarity_levels,
@@ -130,7 +559,7 @@ selected_rarity = st.sidebar.multiselect(
 
 # Filtro 5: Expansión
 if st.sidebar.checkbox("Filtrar por expansión específica"):
-    expansions = sorted(df['expansion_name'].unique())
+    expansions = options['expansions']
     selected_expansion = st.sidebar.selectbox(
         " Expansión",
         options=["Todas"] + list(expansions)
@@ -141,40 +570,26 @@ else:
 # Filtro 6: Pokémon específico
 pokemon_search = st.sidebar.text_input("🔍 Buscar Pokémon específico", "")
 
-# Aplicar filtros
-filtered_df = df.copy()
-
-# Filtrar por rango de precios
-filtered_df = filtered_df[
-    (filtered_df['price'] >= price_range[0]) & 
-    (filtered_df['price'] <= price_range[1])
-]
-
-# Filtrar por tipo de carta
-if selected_types:
-    filtered_df = filtered_df[filtered_df['card_type'].isin(selected_types)]
-
-# Filtrar por generación
-if selected_generation != "Todas":
-    filtered_df = filtered_df[filtered_df['generation'] == selected_generation]
-
-# Filtrar por rareza
-if selected_rarity:
-    filtered_df = filtered_df[filtered_df['rarity_level'].isin(selected_rarity)]
+# Aplicar filtros en SQL: cada consulta de la página reutiliza la misma cláusula
+where_clause, where_params = build_filter_clause(
+    price_range, selected_types, selected_generation, selected_rarity,
+    selected_expansion, pokemon_search, options
+)
 
-# Filtrar por expansión
-if selected_expansion != "Todas":
-    filtered_df = filtered_df[filtered_df['expansion_name'] == selected_expansion]
+def query_cards(select, suffix=""):
+    """Consulta vw_card_details con los filtros actuales"""
+    return run_query(f"SELECT {select} FROM vw_card_details {where_clause} {suffix}",
+                     where_params, data_version)
 
-# Filtrar por búsqueda de Pokémon
-if pokemon_search:
-    filtered_df = filtered_df[
-        filtered_df['pokemon_name'].str.contains(pokemon_search, case=False, na=False)
-    ]
+summary = query_cards(
+    "COUNT(*) AS total_cards, AVG(price) AS avg_price, MAX(price) AS max_price, SUM(is_rare) AS rare_cards"
+).iloc[0]
+filtered_count = int(summary['total_cards'])
+total_count = int(stats_data['stats'].get('total_cards', filtered_count))
 
 # Mostrar resumen de filtros
 st.sidebar.markdown("---")
-st.sidebar.markdown(f"** Resultados:** {len(filtered_df):,} cartas")
+st.sidebar.markdown(f"** Resultados:** {filtered_count:,} cartas")
 st.sidebar.markdown(f"** Rango:** £{price_range[0]:.2f} - £{price_range[1]:.2f}")
 st.sidebar.markdown(f"** Tipos:** {len(selected_types)} seleccionados")
 
@@ -191,13 +606,13 @@ col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.metric(
         "Total de Cartas",
-        f"{len(filtered_df):,}",
-        delta=f"{len(filtered_df) - len(df):+,}" if len(filtered_df) != len(df) else None
+        f"{filtered_count:,}",
+        delta=f"{filtered_count - total_count:+,}" if filtered_count != total_count else None
     )
 
 with col2:
-    avg_price = filtered_df['price'].mean()
-    overall_avg = df['price'].mean()
+    avg_price = summary['avg_price'] if pd.notna(summary['avg_price']) else float('nan')
+    overall_avg = stats_data['stats'].get('avg_price', avg_price)
     st.metric(
         "Precio Promedio",
         f"£{avg_price:.2f}",
@@ -205,15 +620,15 @@ with col2:
     )
 
 with col3:
-    max_price = filtered_df['price'].max()
+    max_price = summary['max_price'] if pd.notna(summary['max_price']) else float('nan')
     st.metric(
         "Precio Más Alto",
         f"£{max_price:.2f}"
     )
 
 with col4:
-    rare_cards = filtered_df['is_rare'].sum()
-    rare_percentage = (rare_cards / len(filtered_df) * 100) if len(filtered_df) > 0 else 0
+    rare_cards = int(summary['rare_cards']) if pd.notna(summary['rare_cards']) else 0
+    rare_percentage = (rare_cards / filtered_count * 100) if filtered_count > 0 else 0
     st.metric(
         "Cartas Raras",
         f"{rare_cards:,}",
@@ -234,54 +649,63 @@ tab1, tab2, tab3, tab4 = st.tabs([
 ])
 
 with tab1:
-    # Gráfico 1: Distribución de precios
-    col1, col2 = st.columns([2, 1])
-    
-    with col1:
-        fig1 = px.histogram(
-            filtered_df,
-            x='price',
-            nbins=50,
-            title='Distribución de Precios',
-            labels={'price': 'Precio (£)', 'count': 'Número de Cartas'},
-            color_discrete_sequence=['#FF6B6B']
-        )
-        fig1.update_layout(
-            xaxis_title="Precio (£)",
-            yaxis_title="Número de Cartas",
-            hovermode='x unified'
-        )
-        st.plotly_chart(fig1, use_container_width=True)
-    
-    with col2:
-        # Estadísticas de precio
-        st.markdown("** Estadísticas de Precio**")
-        
-        price_stats = filtered_df['price'].describe()
+    # Gráfico 1: Distribución de precios (barras y caja precalculadas en SQL)
+    distribution = load_price_distribution(where_clause, where_params, data_version)
+    if distribution is None:
+        st.info("Ninguna carta cumple los filtros seleccionados")
+    else:
+        col1, col2 = st.columns([2, 1])
         
-        st.metric("Mínimo", f"£{price_stats['min']:.2f}")
-        st.metric("25% Percentil", f"£{price_stats['25%']:.2f}")
-        st.metric("Mediana", f"£{price_stats['50%']:.2f}")
-        st.metric("75% Percentil", f"£{price_stats['75%']:.2f}")
-        st.metric("Máximo", f"£{price_stats['max']:.2f}")
+        with col1:
+            histogram = distribution['histogram']
+            fig1 = go.Figure(data=[go.Bar(
+                x=(histogram['bin_start'] + histogram['bin_end']) / 2,
+                y=histogram['count'],
+                width=histogram['bin_end'] - histogram['bin_start'],
+                customdata=histogram[['bin_start', 'bin_end']],
+                hovertemplate='£%{customdata[0]:.2f} - £%{customdata[1]:.2f}: %{y:,} cartas<extra></extra>',
+                marker_color='#FF6B6B'
+            )])
+            fig1.update_layout(
+                title='Distribución de Precios',
+                xaxis_title="Precio (£)",
+                yaxis_title="Número de Cartas",
+                bargap=0,
+                hovermode='x unified'
+            )
+            st.plotly_chart(fig1, use_container_width=True)
         
-        # Box plot simple
-        fig_box = go.Figure(data=[go.Box(
-            y=filtered_df['price'],
-            name='Precios',
-            boxpoints='outliers',
-            marker_color='#4ECDC4'
-        )])
-        fig_box.update_layout(
-            title='Box Plot de Precios',
-            yaxis_title='Precio (£)',
-            height=300
-        )
-        st.plotly_chart(fig_box, use_container_width=True)
+        with col2:
+            # Estadísticas de precio
+            st.markdown("** Estadísticas de Precio**")
+            
+            st.metric("Mínimo", f"£{distribution['min']:.2f}")
+            st.metric("25% Percentil", f"£{distribution['q1']:.2f}")
+            st.metric("Mediana", f"£{distribution['median']:.2f}")
+            st.metric("75% Percentil", f"£{distribution['q3']:.2f}")
+            st.metric("Máximo", f"£{distribution['max']:.2f}")
+            
+            # Box plot simple (sin puntos atípicos individuales)
+            fig_box = go.Figure(data=[go.Box(
+                q1=[distribution['q1']],
+                median=[distribution['median']],
+                q3=[distribution['q3']],
+                lowerfence=[distribution['lower_fence']],
+                upperfence=[distribution['upper_fence']],
+                mean=[distribution['mean']],
+                name='Precios',
+                marker_color='#4ECDC4'
+            )])
+            fig_box.update_layout(
+                title='Box Plot de Precios',
+                yaxis_title='Precio (£)',
+                height=300
+            )
+            st.plotly_chart(fig_box, use_container_width=True)
 
 with tab2:
     # Gráfico 2: Top 10 Pokémon más caros
-    top_10 = filtered_df.nlargest(10, 'price')[['pokemon_name', 'price', 'expansion_name', 'rarity_level']]
+    top_10 = query_cards("pokemon_name, price, expansion_name, rarity_level", "ORDER BY price DESC LIMIT 10")
     
     fig2 = px.bar(
         top_10,
@@ -314,28 +738,40 @@ with tab3:
     col1, col2 = st.columns(2)
     
     with col1:
-        # Box plot por tipo
-        fig3 = px.box(
-            filtered_df,
-            x='card_type',
-            y='price',
-            title='Distribución de Precios por Tipo de Carta',
-            labels={'card_type': 'Tipo de Carta', 'price': 'Precio (£)'},
-            color='card_type',
-            color_discrete_sequence=px.colors.qualitative.Set3
-        )
-        fig3.update_layout(
-            xaxis_title="Tipo de Carta",
-            yaxis_title="Precio (£)",
-            showlegend=False,
-            height=400
-        )
-        st.plotly_chart(fig3, use_container_width=True)
+        # Box plot por tipo (cajas precalculadas en SQL)
+        boxes = load_price_boxes_by_type(where_clause, where_params, data_version)
+        if boxes.empty:
+            st.info("Ninguna carta cumple los filtros seleccionados")
+        else:
+            colors = px.colors.qualitative.Set3
+            fig3 = go.Figure(data=[
+                go.Box(
+                    x=[row.card_type],
+                    q1=[row.q1],
+                    median=[row.median],
+                    q3=[row.q3],
+                    lowerfence=[row.lower_fence],
+                    upperfence=[row.upper_fence],
+                    mean=[row.mean],
+                    name=row.card_type,
+                    marker_color=colors[number % len(colors)]
+                )
+                for number, row in enumerate(boxes.itertuples(index=False))
+            ])
+            fig3.update_layout(
+                title='Distribución de Precios por Tipo de Carta',
+                xaxis_title="Tipo de Carta",
+                yaxis_title="Precio (£)",
+                showlegend=False,
+                height=400
+            )
+            st.plotly_chart(fig3, use_container_width=True)
     
     with col2:
         # Precio promedio por tipo
-        avg_by_type = filtered_df.groupby('card_type')['price'].agg(['mean', 'count']).reset_index()
-        avg_by_type = avg_by_type.sort_values('mean', ascending=False)
+        avg_by_type = query_cards(
+            "card_type, AVG(price) AS mean, COUNT(*) AS count", "GROUP BY card_type ORDER BY mean DESC"
+        )
         
         fig4 = px.bar(
             avg_by_type,
@@ -395,9 +831,12 @@ with tab4:
             st.plotly_chart(fig6, use_container_width=True)
     
     # Scatter plot: Precio vs Rareza por generación
-    if 'rarity_score' in filtered_df.columns:
+    if has_rarity_score and distribution is not None:
+        scatter_df, scatter_mode, scatter_total = load_rarity_scatter(
+            where_clause, where_params, data_version, distribution
+        )
         fig7 = px.scatter(
-            filtered_df,
+            scatter_df,
             x='rarity_score',
             y='price',
             color='generation',
@@ -409,6 +848,13 @@ with tab4:
         )
         fig7.update_layout(height=500)
         st.plotly_chart(fig7, use_container_width=True)
+        if scatter_mode == 'sample':
+            st.caption(
+                f"Modo muestra: {len(scatter_df):,} de {scatter_total:,} cartas, estratificada por generación "
+                f"y score de rareza; se conservan hasta {SCATTER_OUTLIER_LIMIT:,} precios atípicos (los más extremos)"
+            )
+        else:
+            st.caption(f"Modo completo: {scatter_total:,} cartas")
 
 # Sección 3: Tabla de datos
 st.markdown("---")
@@ -421,7 +867,7 @@ if show_data:
     # Seleccionar columnas para mostrar
     columns_to_show = st.multiselect(
         "Seleccionar columnas para mostrar:",
-        options=filtered_df.columns.tolist(),
+        options=options['columns'],
         default=['pokemon_name', 'card_type', 'price', 'rarity_level', 'expansion_name', 'generation']
     )
     
@@ -429,23 +875,29 @@ if show_data:
         # Mostrar datos con paginación
         items_per_page = st.slider("Items por página", 10, 100, 20)
         
-        total_pages = max(1, len(filtered_df) // items_per_page)
+        total_pages = max(1, -(-filtered_count // items_per_page))
         page = st.number_input("Página", min_value=1, max_value=total_pages, value=1)
         
         start_idx = (page - 1) * items_per_page
         end_idx = start_idx + items_per_page
         
+        # Solo se leen las filas de la página actual
+        page_df = run_query(
+            f"SELECT {', '.join(columns_to_show)} FROM vw_card_details {where_clause} "
+            f"ORDER BY card_id LIMIT ? OFFSET ?",
+            where_params + (items_per_page, start_idx), data_version
+        )
         st.dataframe(
-            filtered_df[columns_to_show].iloc[start_idx:end_idx].style.format({'price': '£{:.2f}'}),
+            page_df.style.format({'price': '£{:.2f}'}),
             use_container_width=True
         )
         
-        st.caption(f"Mostrando {start_idx+1}-{min(end_idx, len(filtered_df))} de {len(filtered_df)} registros")
+        st.caption(f"Mostrando {start_idx+1}-{min(end_idx, filtered_count)} de {filtered_count} registros")
     
     # Opción para descargar datos
     st.download_button(
         label=" Descargar datos filtrados (CSV)",
-        data=filtered_df.to_csv(index=False).encode('utf-8'),
+        data=query_cards("*").to_csv(index=False).encode('utf-8'),
         file_name=f"pokemon_cards_filtered_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
         mime="text/csv"
     )
@@ -459,18 +911,49 @@ col1, col2 = st.columns(2)
 with col1:
     if st.button(" Correlación Precio-Rareza"):
         # Calcular correlación
-        if 'rarity_score' in filtered_df.columns:
-            correlation = filtered_df['price'].corr(filtered_df['rarity_score'])
+        regression = load_rarity_regression(where_clause, where_params, data_version) if has_rarity_score else None
+        if regression is not None and distribution is not None:
+            correlation = regression['r']
+            title = f'Correlación: Precio vs Rareza (r = {correlation:.3f})'
+            labels = {'rarity_score': 'Score de Rareza', 'price': 'Precio (£)'}
             
-            fig_corr = px.scatter(
-                filtered_df,
-                x='rarity_score',
-                y='price',
-                trendline="ols",
-                title=f'Correlación: Precio vs Rareza (r = {correlation:.3f})',
-                labels={'rarity_score': 'Score de Rareza', 'price': 'Precio (£)'}
-            )
+            # Hasta SCATTER_POINT_LIMIT cartas se dibujan todos los puntos; por
+            # encima, una rejilla de densidad agrupada en SQL
+            if regression['n'] <= SCATTER_POINT_LIMIT:
+                fig_corr = px.scatter(
+                    query_cards("rarity_score, price"),
+                    x='rarity_score',
+                    y='price',
+                    title=title,
+                    labels=labels
+                )
+                corr_caption = f"Modo completo: {regression['n']:,} cartas"
+            else:
+                grid = load_rarity_density(where_clause, where_params, data_version, distribution)
+                fig_corr = go.Figure(data=[go.Heatmap(
+                    x=grid.columns,
+                    y=grid.index,
+                    z=grid.values,
+                    colorscale='Viridis',
+                    colorbar={'title': 'Cartas'},
+                    hovertemplate='Score %{x} · £%{y:.2f}: %{z:,} cartas<extra></extra>'
+                )])
+                fig_corr.update_layout(title=title, xaxis_title='Score de Rareza', yaxis_title='Precio (£)')
+                corr_caption = (f"Modo densidad: {regression['n']:,} cartas agrupadas por score de rareza "
+                                f"y {DENSITY_PRICE_BINS} rangos de precio")
+            
+            # Recta de mínimos cuadrados calculada con los estadísticos suficientes
+            x_line = [regression['x_min'], regression['x_max']]
+            fig_corr.add_trace(go.Scatter(
+                x=x_line,
+                y=[regression['intercept'] + regression['slope'] * x for x in x_line],
+                mode='lines',
+                name='Tendencia (MCO)',
+                line={'color': '#FF6B6B'}
+            ))
             st.plotly_chart(fig_corr, use_container_width=True)
+            st.caption(f"{corr_caption}. Tendencia: precio = {regression['intercept']:.2f} "
+                       f"+ {regression['slope']:.2f} × score")
             
             st.info(f"**Coeficiente de correlación:** {correlation:.3f}")
             if correlation > 0.7:
@@ -35,10 +35,47 @@ CREATE TABLE IF NOT EXISTS etl_metadata (
     error_message TEXT
 );
 
+-- Métricas por etapa de cada ejecución del ETL
+CREATE TABLE IF NOT EXISTS etl_stage_metrics (
+    metric_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    wall_seconds REAL,
+    cpu_seconds REAL,
+    peak_rss_mb REAL,
+    rows INTEGER,
+    rows_per_second REAL,
+    
+    FOREIGN KEY (run_id) REFERENCES etl_metadata(run_id)
+        ON DELETE CASCADE
+);
+
+-- Vista de detalle de cartas (se recrea en cada carga para incorporar columnas nuevas)
+DROP VIEW IF EXISTS vw_card_details;
+CREATE VIEW vw_card_details AS
+SELECT
+    c.card_id,
+    c.pokemon_name,
+    c.card_type,
+    c.card_number,
+    c.price,
+    c.rarity_level,
+    c.rarity_score,
+    c.is_rare,
+    e.name AS expansion_name,
+    e.generation
+FROM cards c
+JOIN expansions e ON c.expansion_id = e.expansion_id;
+
+-- Clave natural de una carta (permite cargas incrementales idempotentes)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cards_natural_key
+    ON cards(expansion_id, pokemon_name, card_type, card_number);
+
 -- Índices
 CREATE INDEX IF NOT EXISTS idx_cards_pokemon ON cards(pokemon_name);
 CREATE INDEX IF NOT EXISTS idx_cards_price ON cards(price DESC);
 CREATE INDEX IF NOT EXISTS idx_cards_rarity ON cards(rarity_level);
 CREATE INDEX IF NOT EXISTS idx_cards_type ON cards(card_type);
 CREATE INDEX IF NOT EXISTS idx_cards_expansion ON cards(expansion_id);
-CREATE INDEX IF NOT EXISTS idx_expansions_generation ON expansions(generation);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_expansions_generation ON expansions(generation);
+CREATE INDEX IF NOT EXISTS idx_stage_metrics_run ON etl_stage_metrics(run_id);
\ No newline at end of file
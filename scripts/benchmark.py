@@ -0,0 +1,370 @@
+"""
+Benchmark de escala del pipeline ETL para Pokémon TCG
+Mide extracción, transformación, carga y verificación sobre catálogos
+sintéticos de varios tamaños y compara contra una línea base guardada
+"""
+
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+from synthetic_data import DEFAULT_SEED, PROJECT_ROOT, STANDARD_SIZES, generate_catalog, load_source_profile, size_label
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Línea base guardada con --update-baseline
+DEFAULT_BASELINE_PATH = PROJECT_ROOT / "benchmarks" / "baseline.json"
+
+# Directorio de trabajo (catálogos sintéticos y bases de datos temporales)
+DEFAULT_WORK_DIR = Path(tempfile.gettempdir()) / "pokemon_tcg_benchmark"
+
+# Margen permitido antes de considerar una regresión (20 %)
+DEFAULT_TOLERANCE = 0.20
+
+BENCHMARK_STAGES = ("extract", "transform", "load", "verify", "load_cards", "load_cards_legacy")
+
+def legacy_card_rows(df, expansion_map: dict):
+    """
+    Filas de cartas construidas fila por fila con iterrows, como hacía
+    load_cards antes de la versión por columnas (referencia del benchmark)
+
+    Args:
+        df: DataFrame transformado
+        expansion_map: Diccionario de mapeo expansión -> id
+
+    Yields:
+        Tuplas en el orden de columnas de load.CARDS_UPSERT_SQL
+    """
+    for _, row in df.iterrows():
+        expansion_id = expansion_map.get(row['expansion_name'])
+        if expansion_id:
+            yield (
+                expansion_id,
+                row['pokemon_name'],
+                row['card_type'],
+                row['card_number'],
+                row['price'],
+                int(row['is_rare']),
+                row['rarity_level'],
+                int(row['rarity_score'])
+            )
+
+def run_load_cards_comparison(df_transformed, db_path: str) -> List[dict]:
+    """
+    Mide load_cards frente a la construcción fila por fila (legacy_card_rows)
+
+    Cada versión carga las cartas en una base de datos nueva con el esquema
+    y las expansiones ya creados, así solo se compara la carga de cartas.
+
+    Args:
+        df_transformed: DataFrame transformado
+        db_path: Base de datos principal del benchmark (se usan rutas derivadas)
+
+    Returns:
+        Métricas de las etapas load_cards y load_cards_legacy
+    """
+    import sqlite3
+    from run_metrics import StageMetrics
+    from load import CARDS_UPSERT_SQL, create_database_schema, load_expansions, load_cards
+
+    measured = []
+    for stage_name in ("load_cards", "load_cards_legacy"):
+        stage_db = Path(f"{db_path}.{stage_name}")
+        stage_db.unlink(missing_ok=True)
+        conn = sqlite3.connect(stage_db)
+        try:
+            create_database_schema(str(stage_db), include_indexes=False, conn=conn)
+            expansion_map = load_expansions(df_transformed, str(stage_db), conn=conn)
+            with StageMetrics(stage_name, measured) as stage:
+                if stage_name == "load_cards":
+                    load_cards(df_transformed, expansion_map, str(stage_db), conn=conn)
+                else:
+                    conn.executemany(CARDS_UPSERT_SQL, legacy_card_rows(df_transformed, expansion_map))
+                    conn.commit()
+                stage.rows = len(df_transformed)
+        finally:
+            conn.close()
+            stage_db.unlink(missing_ok=True)
+    return [stage.as_dict() for stage in measured]
+
+def run_single_size(input_path: str, db_path: str, max_workers: Optional[int] = None,
+                    legacy_load: bool = True) -> dict:
+    """
+    Ejecuta las etapas del pipeline sobre un catálogo y devuelve sus métricas
+
+    Se ejecuta en un proceso propio por tamaño (ver run_benchmarks), así la
+    memoria máxima de un tamaño no contamina al siguiente. La memoria
+    reportada es el máximo de cada etapa (ver run_metrics.StageMetrics).
+
+    Args:
+        input_path: CSV sintético
+        db_path: Base de datos temporal (se reemplaza)
+        max_workers: Si se indica, mide también transform_data_parallel con
+            1 a max_workers procesos (ver run_workers_sweep)
+        legacy_load: Mide también load_cards frente a la carga fila por fila
+            (ver run_load_cards_comparison)
+
+    Returns:
+        Diccionario con 'stages' (métricas por etapa, ver
+        run_metrics.StageMetrics.as_dict) y 'workers' (barrido de procesos)
+    """
+    from run_metrics import StageMetrics
+    from extraction import extract_data
+    from transformation import transform_data
+    from load import load_data_to_db
+
+    Path(db_path).unlink(missing_ok=True)
+    measured = []
+    with StageMetrics("extract", measured) as stage:
+        df_raw = extract_data(input_path)
+        stage.rows = len(df_raw)
+    with StageMetrics("transform", measured) as stage:
+        df_transformed = transform_data(df_raw)
+        stage.rows = len(df_raw)
+    sweep = run_workers_sweep(df_raw, max_workers, measured[-1].wall_seconds) if max_workers else []
+    del df_raw
+    with StageMetrics("load", measured) as stage:
+        results = load_data_to_db(df_transformed, db_path)
+        stage.rows = results["rows_received"]
+
+    # La verificación se mide dentro de load_data_to_db; se descuenta de la carga
+    verify = next(metric for metric in results["stage_metrics"] if metric["stage"] == "verify")
+    measured[-1].exclude(verify)
+    stages = [stage.as_dict() for stage in measured] + [verify]
+    if legacy_load:
+        stages += run_load_cards_comparison(df_transformed, db_path)
+    return {"stages": stages, "workers": sweep}
+
+def run_workers_sweep(df_raw, max_workers: int, serial_seconds: float) -> List[dict]:
+    """
+    Mide transform_data_parallel con 1 a max_workers procesos
+
+    Args:
+        df_raw: DataFrame extraído
+        max_workers: Número máximo de procesos
+        serial_seconds: Tiempo de transform_data (un solo proceso, sin pool)
+
+    Returns:
+        Lista de métricas por número de procesos, con la aceleración
+        respecto a transform_data en 'speedup'
+    """
+    from run_metrics import StageMetrics
+    from transformation import transform_data_parallel
+
+    sweep = []
+    for workers in range(1, max_workers + 1):
+        measured = []
+        with StageMetrics(f"transform_parallel_{workers}", measured) as stage:
+            transform_data_parallel(df_raw, workers)
+            stage.rows = len(df_raw)
+        metric = measured[0].as_dict()
+        metric["workers"] = workers
+        metric["speedup"] = round(serial_seconds / metric["wall_seconds"], 2) if metric["wall_seconds"] else None
+        sweep.append(metric)
+    return sweep
+
+def _run_in_subprocess(input_path: Path, db_path: Path, max_workers: Optional[int] = None,
+                       legacy_load: bool = True) -> dict:
+    """Ejecuta run_single_size en un proceso nuevo y lee sus métricas de un archivo JSON"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as result_file:
+        result_path = Path(result_file.name)
+    command = [sys.executable, str(Path(__file__).resolve()), "--run-one", str(input_path),
+               "--db", str(db_path), "--result-file", str(result_path)]
+    if max_workers:
+        command += ["--workers", str(max_workers)]
+    if not legacy_load:
+        command.append("--skip-legacy-load")
+    try:
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(result_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        result_path.unlink(missing_ok=True)
+
+def run_benchmarks(sizes: List[int], work_dir: Path, seed: int = DEFAULT_SEED,
+                   max_workers: Optional[int] = None, legacy_load: bool = True) -> tuple:
+    """
+    Genera (si no existen) los catálogos sintéticos y mide cada tamaño
+
+    Args:
+        sizes: Números de filas a medir
+        work_dir: Directorio para los catálogos y las bases de datos temporales
+        seed: Semilla del generador
+        max_workers: Si se indica, barrido de transform_data_parallel de 1 a
+            este número de procesos
+        legacy_load: Compara load_cards con la carga fila por fila
+
+    Returns:
+        Tupla con (tamaño -> etapa -> métricas, tamaño -> barrido de procesos)
+    """
+    work_dir.mkdir(parents=True, exist_ok=True)
+    profile = None
+    results = {}
+    sweeps = {}
+    for size in sizes:
+        input_path = work_dir / f"pokemon_cards_{size_label(size)}_seed{seed}.csv"
+        if not input_path.exists():
+            profile = profile or load_source_profile()
+            generate_catalog(size, str(input_path), seed=seed, profile=profile)
+        logger.info(f"Midiendo {size_label(size)} filas...")
+        metrics = _run_in_subprocess(input_path, work_dir / f"benchmark_{size_label(size)}.db",
+                                     max_workers, legacy_load)
+        results[str(size)] = {metric["stage"]: metric for metric in metrics["stages"]}
+        if metrics["workers"]:
+            sweeps[str(size)] = metrics["workers"]
+        (work_dir / f"benchmark_{size_label(size)}.db").unlink(missing_ok=True)
+    return results, sweeps
+
+def find_regressions(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Compara los resultados con la línea base
+
+    Una etapa regresa si procesa menos filas/s o usa más memoria que la
+    línea base, más allá de la tolerancia. Los tamaños o etapas que no están
+    en la línea base no se comparan.
+
+    Args:
+        results: Resultados de run_benchmarks
+        baseline: Línea base con la misma estructura
+        tolerance: Margen relativo permitido
+
+    Returns:
+        Lista de mensajes, uno por regresión
+    """
+    regressions = []
+    for size, stages in results.items():
+        for stage, metric in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if not reference:
+                continue
+            label = f"{size_label(int(size))}/{stage}"
+            if reference.get("rows_per_second") and metric["rows_per_second"] is not None \
+                    and metric["rows_per_second"] < reference["rows_per_second"] * (1 - tolerance):
+                regressions.append(f"{label}: {metric['rows_per_second']:.0f} filas/s "
+                                   f"(línea base {reference['rows_per_second']:.0f})")
+            if reference.get("peak_rss_mb") and metric["peak_rss_mb"] is not None \
+                    and metric["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+                regressions.append(f"{label}: {metric['peak_rss_mb']:.0f} MB de memoria máxima "
+                                   f"(línea base {reference['peak_rss_mb']:.0f} MB)")
+    return regressions
+
+def print_table(results: dict, baseline: Optional[dict] = None) -> None:
+    """Imprime filas/s y memoria máxima por tamaño y etapa"""
+    baseline = baseline or {}
+    print(f"{'Tamaño':>8} {'Etapa':<18} {'Segundos':>9} {'Filas/s':>12} {'Base filas/s':>13} {'Memoria MB':>11}")
+    for size, stages in results.items():
+        for stage in BENCHMARK_STAGES:
+            metric = stages.get(stage)
+            if not metric:
+                continue
+            reference = baseline.get(size, {}).get(stage, {}).get("rows_per_second")
+            rows_per_second = metric["rows_per_second"]
+            print(f"{size_label(int(size)):>8} {stage:<18} {metric['wall_seconds']:>9.3f} "
+                  f"{rows_per_second if rows_per_second is not None else '-':>12} "
+                  f"{reference if reference is not None else '-':>13} "
+                  f"{metric['peak_rss_mb'] if metric['peak_rss_mb'] is not None else '-':>11}")
+
+def print_load_cards_speedup(results: dict) -> None:
+    """Imprime cuántas veces más rápida es load_cards que la carga fila por fila"""
+    for size, stages in results.items():
+        current, legacy = stages.get("load_cards"), stages.get("load_cards_legacy")
+        if current and legacy and current["wall_seconds"]:
+            print(f"{size_label(int(size)):>8} load_cards: {legacy['wall_seconds'] / current['wall_seconds']:.1f}x "
+                  f"más rápido que fila por fila")
+
+def print_workers_sweep(results: dict, sweeps: dict) -> None:
+    """Imprime tiempo y aceleración de transform_data_parallel frente a transform_data"""
+    print(f"\n{'Tamaño':>8} {'Procesos':>9} {'Segundos':>9} {'Aceleración':>12} {'Memoria MB':>11}")
+    for size, sweep in sweeps.items():
+        serial = results[size]["transform"]
+        print(f"{size_label(int(size)):>8} {'serie':>9} {serial['wall_seconds']:>9.3f} {1.0:>12.2f} "
+              f"{serial['peak_rss_mb'] if serial['peak_rss_mb'] is not None else '-':>11}")
+        for metric in sweep:
+            print(f"{size_label(int(size)):>8} {metric['workers']:>9} {metric['wall_seconds']:>9.3f} "
+                  f"{metric['speedup'] if metric['speedup'] is not None else '-':>12} "
+                  f"{metric['peak_rss_mb'] if metric['peak_rss_mb'] is not None else '-':>11}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Función principal
+
+    Returns:
+        Código de salida: 0 sin regresiones, 1 si alguna etapa regresó
+    """
+    parser = argparse.ArgumentParser(description="Benchmark de escala del pipeline ETL")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(STANDARD_SIZES),
+                        help="Tamaños a medir (por defecto: %(default)s)")
+    parser.add_argument("--work-dir", default=str(DEFAULT_WORK_DIR),
+                        help="Directorio para los catálogos sintéticos (por defecto: %(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH),
+                        help="Línea base JSON (por defecto: %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Margen relativo antes de marcar una regresión (por defecto: %(default)s)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--skip-legacy-load", action="store_true",
+                        help="No compara load_cards con la carga fila por fila (iterrows), "
+                             "que es lenta en los tamaños grandes")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Mide también transform_data_parallel con 1 a N procesos y su "
+                             "aceleración frente a transform_data")
+    # Uso interno: mide un solo catálogo en un proceso aparte
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_one:
+        # En el proceso de medición solo se muestran advertencias y errores
+        logging.getLogger().setLevel(logging.WARNING)
+        metrics = run_single_size(args.run_one, args.db, args.workers,
+                                  not args.skip_legacy_load)
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f)
+        return 0
+
+    results, sweeps = run_benchmarks(args.sizes, Path(args.work_dir), args.seed, args.workers,
+                                     not args.skip_legacy_load)
+
+    baseline_path = Path(args.baseline)
+    baseline = {}
+    if baseline_path.exists():
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    print_table(results, baseline)
+    print_load_cards_speedup(results)
+    if sweeps:
+        print_workers_sweep(results, sweeps)
+
+    if args.update_baseline:
+        baseline.update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nLínea base actualizada: {baseline_path}")
+        return 0
+
+    if not baseline:
+        print("\nSin línea base; use --update-baseline para guardarla.")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegresiones detectadas:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+    print("\nSin regresiones respecto a la línea base.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""
+Captura de cambios (CDC) entre extracciones sucesivas para Pokémon TCG
+Compara el hash de cada fila cruda con la instantánea de la ejecución
+anterior para transformar y cargar solo las cartas nuevas o modificadas
+"""
+
+import pandas as pd
+import logging
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from storage import output_path_for, read_dataframe, write_dataframe
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Clave natural transformada de una carta (la misma que idx_cards_natural_key,
+# con el nombre de la expansión en lugar de su id)
+NATURAL_KEY_COLUMNS = ['expansion_name', 'pokemon_name', 'card_type', 'card_number']
+
+# Columnas de hash de la instantánea: fila cruda, clave natural y valores transformados
+ROW_HASH_COLUMN = '_row_hash'
+KEY_HASH_COLUMN = '_key_hash'
+VALUE_HASH_COLUMN = '_value_hash'
+SNAPSHOT_COLUMNS = [ROW_HASH_COLUMN, KEY_HASH_COLUMN, VALUE_HASH_COLUMN] + NATURAL_KEY_COLUMNS
+
+def _snapshot_format() -> str:
+    """Parquet si pyarrow está instalado; si no, CSV"""
+    try:
+        import pyarrow  # noqa: F401
+        return "parquet"
+    except ImportError:
+        return "csv"
+
+def snapshot_path_for(db_path: str) -> Path:
+    """
+    Ruta de la instantánea, guardada junto a la base de datos
+
+    Args:
+        db_path: Ruta a la base de datos
+
+    Returns:
+        Ruta de la instantánea con la extensión de su formato
+    """
+    return output_path_for(f"{db_path}.snapshot.csv", _snapshot_format())
+
+def add_row_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega a cada fila cruda un hash de 64 bits de la fila completa
+
+    Args:
+        df: DataFrame crudo de extract_data
+
+    Returns:
+        Copia del DataFrame (con índice 0..n-1) con la columna _row_hash
+    """
+    hashed = df.reset_index(drop=True)
+    hashed[ROW_HASH_COLUMN] = pd.util.hash_pandas_object(hashed, index=False).to_numpy()
+    return hashed
+
+def build_snapshot(current: pd.DataFrame, transformed_rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Construye la instantánea de una extracción a partir de sus filas transformadas
+
+    La instantánea guarda, en el orden de la extracción, el hash crudo, la
+    clave natural transformada y el hash de la fila transformada de cada
+    fila que sobrevive a la transformación. Las filas descartadas (por
+    ejemplo, con precio inválido) no se guardan y se vuelven a transformar en
+    la siguiente ejecución.
+
+    Args:
+        current: Extracción con hashes (add_row_hashes)
+        transformed_rows: Resultado de transformation.transform_rows sobre
+            las filas de current, con su mismo índice
+
+    Returns:
+        DataFrame con las columnas de SNAPSHOT_COLUMNS
+    """
+    keys = transformed_rows[NATURAL_KEY_COLUMNS].astype(object)
+    snapshot = keys.assign(**{
+        ROW_HASH_COLUMN: current.loc[keys.index, ROW_HASH_COLUMN].to_numpy(),
+        KEY_HASH_COLUMN: pd.util.hash_pandas_object(keys, index=False).to_numpy(),
+        VALUE_HASH_COLUMN: pd.util.hash_pandas_object(transformed_rows.astype(object), index=False).to_numpy()
+    })
+    return snapshot[SNAPSHOT_COLUMNS].sort_index()
+
+def _winners(snapshot: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fila que queda en la base de datos para cada clave natural, indexada por _key_hash
+
+    Reproduce la carga completa: transform_data elimina las filas
+    transformadas idénticas (conserva la primera) y load_cards se queda con
+    la última fila de cada clave.
+    """
+    return (snapshot.drop_duplicates(VALUE_HASH_COLUMN, keep='first')
+            .drop_duplicates(KEY_HASH_COLUMN, keep='last')
+            .set_index(KEY_HASH_COLUMN))
+
+def diff_snapshots(current: pd.DataFrame, previous: pd.DataFrame,
+                   transform: Callable[[pd.DataFrame], pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame, dict, pd.DataFrame]:
+    """
+    Compara la extracción actual con la instantánea anterior por clave natural
+
+    Solo se transforman las filas crudas cuyo hash no está en la instantánea;
+    la clave natural de las demás se toma de ella. Cada clave natural queda
+    representada por la fila que ganaría en una carga completa, y una clave
+    cambia si los valores transformados de esa fila cambiaron. Las claves de la instantánea que ya no
+    tienen ninguna fila válida se devuelven como bajas, así la base de datos
+    incremental queda igual que tras una carga completa.
+
+    Args:
+        current: Extracción actual con hashes (add_row_hashes)
+        previous: Instantánea anterior (build_snapshot)
+        transform: Transformación por filas sin deduplicar (transformation.transform_rows)
+
+    Returns:
+        Tupla (filas transformadas a cargar, claves eliminadas, estadísticas
+        del diff, instantánea de la extracción actual)
+    """
+    known = previous.drop_duplicates(ROW_HASH_COLUMN).set_index(ROW_HASH_COLUMN)
+    is_known = current[ROW_HASH_COLUMN].isin(known.index)
+
+    # Filas crudas nuevas: se transforman para conocer su clave natural
+    fresh = transform(strip_hashes(current[~is_known]))
+    known_rows = known.loc[current.loc[is_known, ROW_HASH_COLUMN]].reset_index()
+    known_rows.index = current.index[is_known]
+    snapshot = pd.concat([known_rows[previous.columns], build_snapshot(current, fresh)]).sort_index()
+
+    current_winners = _winners(snapshot)
+    previous_winners = _winners(previous)
+    is_new = ~current_winners.index.isin(previous_winners.index)
+    existing = current_winners.index[~is_new]
+    is_changed = pd.Series(False, index=current_winners.index)
+    is_changed[existing] = (
+        previous_winners.loc[existing, VALUE_HASH_COLUMN].to_numpy()
+        != current_winners.loc[existing, VALUE_HASH_COLUMN].to_numpy()
+    )
+    removed_keys = previous_winners.index.difference(current_winners.index)
+    tombstones = previous_winners.loc[removed_keys, NATURAL_KEY_COLUMNS].reset_index(drop=True)
+
+    # Filas ganadoras de las claves nuevas o modificadas, en el orden de la extracción
+    upsert_values = current_winners.loc[is_new | is_changed.to_numpy(), VALUE_HASH_COLUMN]
+    positions = snapshot.index[snapshot[VALUE_HASH_COLUMN].isin(upsert_values)]
+    positions = positions[~snapshot.loc[positions, VALUE_HASH_COLUMN].duplicated(keep='first').to_numpy()]
+    from_fresh = positions.intersection(fresh.index)
+    pending = positions.difference(fresh.index)
+    parts = [fresh.loc[from_fresh]]
+    if len(pending) > 0:
+        parts.append(transform(strip_hashes(current.loc[pending])))
+    changes = pd.concat(parts).sort_index()
+
+    stats = {
+        "rows_total": len(current),
+        "rows_transformed": int((~is_known).sum()) + len(pending),
+        "new": int(is_new.sum()),
+        "changed": int(is_changed.sum()),
+        "unchanged": int(len(current_winners) - is_new.sum() - is_changed.sum()),
+        "deleted": len(tombstones),
+        "rows_to_load": len(changes)
+    }
+    logger.info(
+        f"Captura de cambios: {stats['new']} nuevas, {stats['changed']} modificadas, "
+        f"{stats['unchanged']} sin cambios, {stats['deleted']} eliminadas "
+        f"({stats['rows_transformed']} de {stats['rows_total']} filas transformadas)"
+    )
+    return changes, tombstones, stats, snapshot
+
+def strip_hashes(df: pd.DataFrame) -> pd.DataFrame:
+    """Quita la columna de hash para pasar las filas a la transformación"""
+    return df.drop(columns=[ROW_HASH_COLUMN])
+
+def load_snapshot(snapshot_path: Path) -> Optional[pd.DataFrame]:
+    """
+    Lee la instantánea de la ejecución anterior
+
+    Args:
+        snapshot_path: Ruta de la instantánea
+
+    Returns:
+        DataFrame con las claves y sus hashes, o None si no existe o tiene
+        el formato de una versión anterior
+    """
+    if not snapshot_path.exists():
+        return None
+    try:
+        snapshot = read_dataframe(str(snapshot_path))
+        if list(snapshot.columns) != SNAPSHOT_COLUMNS:
+            logger.info(f"La instantánea {snapshot_path} tiene un formato anterior; se hará una carga completa")
+            return None
+        for column in (ROW_HASH_COLUMN, KEY_HASH_COLUMN, VALUE_HASH_COLUMN):
+            snapshot[column] = snapshot[column].astype('uint64')
+        snapshot[NATURAL_KEY_COLUMNS] = snapshot[NATURAL_KEY_COLUMNS].astype(object)
+        return snapshot
+    except Exception as e:
+        logger.warning(f"No se pudo leer la instantánea {snapshot_path}, se hará una carga completa: {str(e)}")
+        return None
+
+def save_snapshot(df: pd.DataFrame, snapshot_path: Path) -> Path:
+    """
+    Guarda la instantánea de la extracción actual para la próxima ejecución
+
+    Args:
+        df: Instantánea (build_snapshot o diff_snapshots)
+        snapshot_path: Ruta de la instantánea
+
+    Returns:
+        Ruta escrita
+    """
+    path = write_dataframe(df.reset_index(drop=True), str(snapshot_path), _snapshot_format())
+    logger.info(f"Instantánea de la extracción guardada en: {path}")
+    return path
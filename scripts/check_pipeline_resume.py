@@ -0,0 +1,157 @@
+"""
+Comprobación de los caminos del pipeline que reutilizan datos intermedios
+Ejecuta el pipeline completo y luego los caminos que vuelven a leer los datos
+guardados (reutilización y reanudación por etapas), y verifica que el
+resultado no cambia respecto a una transformación nueva
+"""
+
+import argparse
+import logging
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from extraction import DEFAULT_INPUT_PATH, extract_data
+from storage import OUTPUT_FORMATS
+from transformation import read_transformed_data, transform_data
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+MAIN_ETL = Path(__file__).resolve().parent / "main_etl.py"
+
+# Números de carta solo numéricos ('001 OF 147'): sin tipos explícitos, '001' se leería como 1
+NUMERIC_CARD_NUMBER_PATTERN = r'^\d+\s*OF'
+
+def numeric_only_input(input_path: str, output_path: Path) -> Path:
+    """
+    Copia del CSV con solo las cartas de número numérico
+
+    Args:
+        input_path: CSV de origen
+        output_path: Ruta de la copia
+
+    Returns:
+        Ruta de la copia
+    """
+    df = pd.read_csv(input_path, dtype=str, encoding='utf-8')
+    numeric = df['Card Number'].str.strip().str.match(NUMERIC_CARD_NUMBER_PATTERN, na=False)
+    df[numeric].to_csv(output_path, index=False, encoding='utf-8')
+    return output_path
+
+def run_pipeline(input_path: Path, work_dir: Path, output_format: str, extra_args: List[str] = ()) -> None:
+    """Ejecuta main_etl.py con las rutas de work_dir; falla si el código de salida no es 0"""
+    subprocess.run(
+        [sys.executable, str(MAIN_ETL), "--input", str(input_path),
+         "--output", str(work_dir / "processed.csv"), "--raw-output", str(work_dir / "raw.csv"),
+         "--db", str(work_dir / "cards.db"), "--format", output_format, "--yes", *extra_args],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def read_cards(db_path: Path) -> pd.DataFrame:
+    """Cartas cargadas, identificadas por su clave natural y ordenadas"""
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(
+            """SELECT e.name AS expansion_name, c.pokemon_name, c.card_type, c.card_number,
+                      c.price, c.rarity_level, c.rarity_score, c.is_rare
+               FROM cards c JOIN expansions e ON c.expansion_id = e.expansion_id
+               ORDER BY 1, 2, 3, 4""",
+            conn
+        )
+
+def compare_frames(name: str, expected: pd.DataFrame, actual: pd.DataFrame) -> bool:
+    """Registra si dos DataFrames tienen los mismos tipos y valores"""
+    expected = expected.reset_index(drop=True)
+    actual = actual.reset_index(drop=True)
+    if list(expected.dtypes.astype(str)) != list(actual.dtypes.astype(str)):
+        logger.error(f"{name}: tipos distintos\n{pd.DataFrame({'esperado': expected.dtypes, 'leído': actual.dtypes})}")
+        return False
+    try:
+        pd.testing.assert_frame_equal(expected, actual)
+    except AssertionError as e:
+        logger.error(f"{name}: valores distintos\n{e}")
+        return False
+    logger.info(f"{name}: correcto ({len(actual)} filas)")
+    return True
+
+def check_reused_processed(input_path: Path, work_dir: Path, output_format: str) -> bool:
+    """
+    Camino de reutilización: con la misma entrada y sin base de datos, el
+    pipeline carga los datos procesados guardados en vez de transformar
+
+    Returns:
+        True si los datos releídos y las cartas cargadas coinciden con los de
+        una transformación nueva
+    """
+    run_pipeline(input_path, work_dir, output_format)
+    cards_before = read_cards(work_dir / "cards.db")
+
+    fresh = transform_data(extract_data(str(input_path)))
+    reused = read_transformed_data(str(work_dir / f"processed{OUTPUT_FORMATS[output_format]}"))
+    ok = compare_frames(f"[{output_format}] datos procesados releídos", fresh, reused)
+
+    (work_dir / "cards.db").unlink()
+    run_pipeline(input_path, work_dir, output_format)
+    return compare_frames(f"[{output_format}] cartas tras reutilizar los datos procesados",
+                          cards_before, read_cards(work_dir / "cards.db")) and ok
+
+def check_stage_resume(input_path: Path, work_dir: Path, output_format: str) -> bool:
+    """
+    Reanudación por etapas: tras una ejecución completa, `--stages load` y
+    `--stages transform,load` vuelven a cargar los datos guardados sobre la
+    misma base de datos
+
+    Returns:
+        True si el número de cartas y sus valores no cambian
+    """
+    run_pipeline(input_path, work_dir, output_format)
+    cards_before = read_cards(work_dir / "cards.db")
+
+    ok = True
+    for stages in ("load", "transform,load"):
+        run_pipeline(input_path, work_dir, output_format, ["--stages", stages])
+        ok = compare_frames(f"[{output_format}] cartas tras --stages {stages}",
+                            cards_before, read_cards(work_dir / "cards.db")) and ok
+    return ok
+
+def check_resume(input_path: str = DEFAULT_INPUT_PATH, formats: Optional[List[str]] = None) -> bool:
+    """
+    Ejecuta las comprobaciones sobre el CSV y sobre su copia de números numéricos
+
+    Args:
+        input_path: CSV de ejemplo
+        formats: Formatos de los datos intermedios (por defecto, todos)
+
+    Returns:
+        True si todas las comprobaciones pasan
+    """
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        inputs = [Path(input_path), numeric_only_input(input_path, tmp / "numeric_card_numbers.csv")]
+        for source in inputs:
+            logger.info(f"Entrada: {source}")
+            for output_format in formats or sorted(OUTPUT_FORMATS):
+                for check in (check_reused_processed, check_stage_resume):
+                    work_dir = tmp / f"{source.stem}_{output_format}_{check.__name__}"
+                    work_dir.mkdir()
+                    ok = check(source, work_dir, output_format) and ok
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Comprueba que los caminos que reutilizan datos intermedios no alteran las cartas cargadas"
+    )
+    parser.add_argument("--input", default=DEFAULT_INPUT_PATH,
+                        help="CSV de ejemplo (por defecto: %(default)s)")
+    parser.add_argument("--format", dest="formats", nargs="+", choices=sorted(OUTPUT_FORMATS),
+                        help="Formatos a comprobar (por defecto: todos)")
+    args = parser.parse_args()
+
+    sys.exit(0 if check_resume(args.input, args.formats) else 1)
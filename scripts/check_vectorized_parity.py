@@ -0,0 +1,111 @@
+"""
+Comprobación de paridad de las funciones vectorizadas de transformación
+Compara assign_rarity_levels y assign_price_categories con sus versiones
+escalares (calculate_rarity_level y categorize_price) sobre el CSV de
+ejemplo y exactamente en cada límite de los intervalos de precio
+"""
+
+import argparse
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+
+from extraction import DEFAULT_INPUT_PATH, extract_data
+from transformation import (PRICE_BINS, assign_price_categories, assign_rarity_levels,
+                            calculate_rarity_level, categorize_price, transform_rows)
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Scores de rareza posibles (ver parse_card_numbers)
+RARITY_SCORES = (0, 1, 2, 3)
+
+def edge_prices() -> np.ndarray:
+    """
+    Precios en cada límite de PRICE_BINS, justo antes y justo después,
+    más 0, un precio alto, el mayor float finito e infinito
+
+    Returns:
+        Arreglo de precios sin repetidos
+    """
+    edges = [edge for edge in PRICE_BINS if np.isfinite(edge)]
+    prices = [0.0, 1_000_000.0, np.finfo(float).max, np.inf]
+    for edge in edges:
+        prices += [np.nextafter(edge, -np.inf), edge, np.nextafter(edge, np.inf)]
+    return np.unique(prices)
+
+def edge_cases() -> pd.DataFrame:
+    """
+    Todas las combinaciones de precio límite y score de rareza
+
+    Returns:
+        DataFrame con las columnas price y rarity_score
+    """
+    price, rarity_score = np.meshgrid(edge_prices(), RARITY_SCORES)
+    return pd.DataFrame({'price': price.ravel(), 'rarity_score': rarity_score.ravel()})
+
+def find_mismatches(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Filas en las que las versiones vectorizada y escalar no coinciden
+
+    Args:
+        df: DataFrame con las columnas price y rarity_score
+
+    Returns:
+        DataFrame con los valores de ambas versiones para las filas distintas
+    """
+    result = df[['price', 'rarity_score']].copy()
+    result['rarity_vectorized'] = np.asarray(
+        assign_rarity_levels(result['price'], result['rarity_score']), dtype=object
+    )
+    result['rarity_scalar'] = [
+        calculate_rarity_level(price, score)
+        for price, score in zip(result['price'], result['rarity_score'])
+    ]
+    result['category_vectorized'] = np.asarray(assign_price_categories(result['price']), dtype=object)
+    result['category_scalar'] = [categorize_price(price) for price in result['price']]
+
+    different = (
+        (result['rarity_vectorized'] != result['rarity_scalar'])
+        | (result['category_vectorized'] != result['category_scalar'])
+    )
+    return result[different]
+
+def check_parity(input_path: str = DEFAULT_INPUT_PATH) -> bool:
+    """
+    Ejecuta la comprobación sobre el CSV y sobre los límites de precio
+
+    Args:
+        input_path: CSV de ejemplo
+
+    Returns:
+        True si no hay diferencias
+    """
+    sample = transform_rows(extract_data(input_path))
+    cases = {
+        f"CSV de ejemplo ({input_path})": sample,
+        "límites de precio": edge_cases()
+    }
+
+    ok = True
+    for name, df in cases.items():
+        mismatches = find_mismatches(df)
+        if mismatches.empty:
+            logger.info(f"Paridad correcta en {name}: {len(df)} filas")
+        else:
+            ok = False
+            logger.error(f"{len(mismatches)} diferencias en {name}:\n{mismatches.head(20).to_string()}")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compara las funciones vectorizadas de rareza y categoría de precio con las escalares"
+    )
+    parser.add_argument("--input", default=DEFAULT_INPUT_PATH,
+                        help="CSV de ejemplo (por defecto: %(default)s)")
+    args = parser.parse_args()
+
+    sys.exit(0 if check_parity(args.input) else 1)
@@ -4,19 +4,142 @@ Lee el archivo CSV original y extrae los datos
 """
 
 import pandas as pd
+import numpy as np
 import logging
+import sys
 from pathlib import Path
+from typing import Iterator, List, Optional
+
+from storage import read_dataframe, write_dataframe
 
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def extract_data(file_path: str = "C:\\Users\\Gael Pérez Cruz\\Desktop\\pokemon_tcg_analysis\\data\\raw\\pokemon_cards.csv") -> pd.DataFrame:
+# Rutas por defecto relativas a la raíz del proyecto (no al directorio de trabajo)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_INPUT_PATH = str(PROJECT_ROOT / "data" / "raw" / "pokemon_cards.csv")
+
+# Respaldo de los datos crudos
+DEFAULT_RAW_BACKUP_PATH = str(PROJECT_ROOT / "data" / "raw" / "raw_data_backup.csv")
+
+# Tamaño de bloque por defecto para la lectura en streaming
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Esquema del CSV crudo: las columnas de baja cardinalidad se leen como category
+RAW_DTYPES = {
+    'Pokemon': str,
+    'Card Type': 'category',   # ~10 valores distintos
+    'Generation': 'category',  # ~218 valores distintos
+    'Card Number': str
+}
+
+# Esquema del respaldo crudo (save_raw_data guarda el precio ya convertido a float)
+RAW_BACKUP_DTYPES = {**RAW_DTYPES, 'Price': 'float64'}
+
+# Nombres posibles de la columna de precio
+PRICE_COLUMNS = ('Price', 'Price Ł')
+
+def parse_price(value: str) -> float:
+    """
+    Convierte un precio del CSV (por ejemplo '2.95' o '2.95Ł') a float
+    
+    Args:
+        value: Texto de la celda de precio
+    
+    Returns:
+        Precio como float, o NaN si no es un número válido
+    """
+    try:
+        return float(str(value).replace('Ł', '').strip())
+    except ValueError:
+        return np.nan
+
+def _resolve_engine(engine: str) -> str:
+    """Usa el motor pyarrow si se pidió 'auto' y está instalado"""
+    if engine != "auto":
+        return engine
+    try:
+        import pyarrow  # noqa: F401
+        return "pyarrow"
+    except ImportError:
+        return "c"
+
+def _read_csv_options(file_path: str, engine: str) -> dict:
+    """
+    Construye los argumentos de pd.read_csv a partir del esquema declarado
+    
+    Args:
+        file_path: Ruta al archivo CSV
+        engine: Motor de lectura ('c' o 'pyarrow')
+    
+    Returns:
+        Diccionario de argumentos para pd.read_csv
+    """
+    columns = pd.read_csv(file_path, encoding='utf-8', nrows=0).columns
+    dtypes = {column: dtype for column, dtype in RAW_DTYPES.items() if column in columns}
+    options = {"encoding": 'utf-8', "engine": engine, "dtype": dtypes}
+    
+    price_columns = [column for column in PRICE_COLUMNS if column in columns]
+    if engine == "pyarrow":
+        # pyarrow no admite converters: el precio se lee como texto y se convierte después
+        dtypes.update({column: str for column in price_columns})
+    else:
+        options["converters"] = {column: parse_price for column in price_columns}
+    return options
+
+def _parse_price_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Convierte de forma vectorizada las columnas de precio leídas como texto"""
+    for column in PRICE_COLUMNS:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = pd.to_numeric(
+                df[column].str.replace('Ł', '', regex=False).str.strip(), errors='coerce'
+            )
+    return df
+
+def _object_memory_estimate(df: pd.DataFrame) -> int:
+    """
+    Estima la memoria que ocuparía el DataFrame con las columnas category como object
+    
+    Se calcula a partir de los conteos por categoría, sin materializar la copia.
+    """
+    total = int(df.index.memory_usage())
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            counts = series.value_counts(sort=False)
+            total += 8 * len(series)  # punteros de la columna object
+            total += sum(sys.getsizeof(value) * count for value, count in counts.items())
+        else:
+            total += int(series.memory_usage(index=False, deep=True))
+    return total
+
+def log_memory_usage(df: pd.DataFrame) -> None:
+    """
+    Registra la memoria del DataFrame tipado frente a su equivalente sin tipos
+    
+    Args:
+        df: DataFrame leído con el esquema declarado
+    """
+    typed_bytes = int(df.memory_usage(deep=True).sum())
+    untyped_bytes = _object_memory_estimate(df)
+    logger.info(
+        f"Memoria en uso: {typed_bytes / 1024 ** 2:.2f} MB "
+        f"(sin tipos declarados: ~{untyped_bytes / 1024 ** 2:.2f} MB, "
+        f"{untyped_bytes / max(typed_bytes, 1):.1f}x)"
+    )
+
+def extract_data(file_path: str = DEFAULT_INPUT_PATH, engine: str = "auto") -> pd.DataFrame:
     """
     Extrae los datos del archivo CSV
     
+    Las columnas se leen con el esquema declarado en RAW_DTYPES y el precio
+    como float64 (sin el símbolo 'Ł').
+    
     Args:
         file_path: Ruta al archivo CSV
+        engine: Motor de pd.read_csv ('c', 'pyarrow' o 'auto' para usar
+            pyarrow si está instalado)
     
     Returns:
         DataFrame de pandas con los datos extraídos
@@ -30,11 +153,14 @@ def extract_data(file_path: str = "C:\\Users\\Gael Pérez Cruz\\Desktop\\pokemon
         
         logger.info(f"Extrayendo datos de: {file_path}")
         
-        # Leer el archivo CSV
-        # Nota: El archivo usa 'Ł' como símbolo de libra, lo manejaremos en la transformación
-        df = pd.read_csv(file_path, encoding='utf-8')
+        # Leer el archivo CSV con tipos declarados
+        # Nota: El archivo usa 'Ł' como símbolo de libra, se elimina al convertir el precio
+        engine = _resolve_engine(engine)
+        df = pd.read_csv(file_path, **_read_csv_options(file_path, engine))
+        df = _parse_price_columns(df)
         
-        logger.info(f"Datos extraídos exitosamente. Forma: {df.shape}")
+        logger.info(f"Datos extraídos exitosamente con el motor '{engine}'. Forma: {df.shape}")
+        log_memory_usage(df)
         logger.info(f"Columnas: {list(df.columns)}")
         
         # Mostrar información básica
@@ -48,21 +174,77 @@ def extract_data(file_path: str = "C:\\Users\\Gael Pérez Cruz\\Desktop\\pokemon
         logger.error(f"Error en la extracción de datos: {str(e)}")
         raise
 
-def save_raw_data(df: pd.DataFrame, output_path: str = "../data/raw/raw_data_backup.csv"):
+def extract_data_chunks(file_path: str = DEFAULT_INPUT_PATH,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Extrae los datos del archivo CSV en bloques de tamaño fijo
+    
+    La memoria usada queda acotada por chunk_size y no por el tamaño del archivo.
+    
+    Args:
+        file_path: Ruta al archivo CSV
+        chunk_size: Número de filas por bloque
+    
+    Yields:
+        DataFrames de pandas con hasta chunk_size filas
+    """
+    try:
+        path = Path(file_path)
+        if not path.exists():
+            logger.error(f"Archivo no encontrado: {file_path}")
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+        
+        logger.info(f"Extrayendo datos en bloques de {chunk_size} filas de: {file_path}")
+        
+        # pyarrow no admite lectura por bloques; se usa el motor C con el mismo esquema
+        total_rows = 0
+        with pd.read_csv(file_path, chunksize=chunk_size, **_read_csv_options(file_path, "c")) as reader:
+            for chunk_number, chunk in enumerate(reader, start=1):
+                total_rows += len(chunk)
+                logger.info(f"Bloque {chunk_number} extraído: {len(chunk)} filas (acumulado: {total_rows})")
+                yield chunk
+        
+        logger.info(f"Extracción en bloques completada. Total de registros: {total_rows}")
+        
+    except Exception as e:
+        logger.error(f"Error en la extracción de datos: {str(e)}")
+        raise
+
+def read_raw_data(input_path: str = DEFAULT_RAW_BACKUP_PATH) -> pd.DataFrame:
+    """
+    Lee el respaldo crudo guardado con save_raw_data con el esquema de la extracción
+    
+    Args:
+        input_path: Ruta del respaldo (csv, parquet o feather)
+    
+    Returns:
+        DataFrame con los mismos tipos que extract_data
+    """
+    return read_dataframe(input_path, dtypes=RAW_BACKUP_DTYPES)
+
+def save_raw_data(df: pd.DataFrame, output_path: str = DEFAULT_RAW_BACKUP_PATH,
+                  append: bool = False, output_format: str = "csv",
+                  partition_cols: Optional[List[str]] = None) -> Optional[Path]:
     """
     Guarda una copia de los datos extraídos
     
     Args:
         df: DataFrame con los datos
         output_path: Ruta donde guardar el backup
+        append: Agrega las filas al final del archivo (modo streaming)
+        output_format: 'csv', 'parquet' o 'feather' (ver storage.write_dataframe)
+        partition_cols: Columnas de partición para parquet (por ejemplo ['generation'])
+    
+    Returns:
+        Ruta escrita, o None si no se pudo guardar
     """
     try:
-        path = Path(output_path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(output_path, index=False, encoding='utf-8')
-        logger.info(f"Datos crudos guardados en: {output_path}")
+        path = write_dataframe(df, output_path, output_format, partition_cols, append)
+        logger.info(f"Datos crudos guardados en: {path}")
+        return path
     except Exception as e:
         logger.error(f"Error al guardar datos crudos: {str(e)}")
+        return None
 
 if __name__ == "__main__":
     # Ejecutar extracción si se llama directamente
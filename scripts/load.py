@@ -6,41 +6,224 @@ Carga los datos transformados a la base de datos SQLite
 import pandas as pd
 import sqlite3
 import logging
+import os
+import tempfile
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Union
 from sqlalchemy import create_engine, text
 from datetime import datetime
 
+from run_metrics import StageMetrics
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def create_database_schema(db_path: str = "pokemon_cards.db") -> None:
+# PRAGMAs para la carga masiva (rápidos, sin garantías ante un corte de energía)
+BULK_LOAD_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "OFF",
+    "cache_size": -262144  # ~256 MB
+}
+
+# PRAGMAs seguros que se restauran al terminar la carga. synchronous va
+# primero: al volver a journal_mode DELETE se hace el checkpoint del WAL, y
+# con synchronous=FULL esas páginas se escriben a disco con fsync
+SAFE_PRAGMAS = {
+    "synchronous": "FULL",
+    "journal_mode": "DELETE",
+    "cache_size": -2000  # valor por defecto de SQLite
+}
+
+# Columnas que identifican una carta de forma única (ver idx_cards_natural_key)
+CARD_NATURAL_KEY = ['expansion_id', 'pokemon_name', 'card_type', 'card_number']
+
+# Inserción de cartas: las existentes solo se actualizan si cambió algún valor
+CARDS_UPSERT_SQL = f"""INSERT INTO cards
+    (expansion_id, pokemon_name, card_type, card_number, price, is_rare, rarity_level, rarity_score)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT ({", ".join(CARD_NATURAL_KEY)}) DO UPDATE SET
+        price = excluded.price,
+        is_rare = excluded.is_rare,
+        rarity_level = excluded.rarity_level,
+        rarity_score = excluded.rarity_score
+    WHERE cards.price IS NOT excluded.price
+       OR cards.is_rare IS NOT excluded.is_rare
+       OR cards.rarity_level IS NOT excluded.rarity_level
+       OR cards.rarity_score IS NOT excluded.rarity_score"""
+
+# Tablas de resumen del dashboard (nombre, consulta, columnas indexadas).
+# Conservan los nombres vw_* que consulta dashboard/app.py, pero se
+# materializan al final de cada carga en lugar de ser vistas.
+SUMMARY_TABLES = [
+    ("vw_statistics",
+     """SELECT
+            COUNT(*) AS total_cards,
+            COUNT(DISTINCT pokemon_name) AS unique_pokemon,
+            COUNT(DISTINCT expansion_id) AS unique_expansions,
+            AVG(price) AS avg_price,
+            MAX(price) AS max_price,
+            SUM(CASE WHEN is_rare THEN 1 ELSE 0 END) AS rare_cards_count
+        FROM cards""",
+     []),
+    ("vw_prices_by_generation",
+     """SELECT
+            e.generation,
+            COUNT(*) AS card_count,
+            AVG(c.price) AS avg_price,
+            MIN(c.price) AS min_price,
+            MAX(c.price) AS max_price
+        FROM cards c
+        JOIN expansions e ON c.expansion_id = e.expansion_id
+        GROUP BY e.generation""",
+     ["generation", "avg_price"]),
+    ("vw_rarity_distribution",
+     """SELECT
+            rarity_level,
+            COUNT(*) AS count,
+            ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM cards), 2) AS percentage
+        FROM cards
+        GROUP BY rarity_level""",
+     ["rarity_level", "count"]),
+]
+
+def _connect(db_path: str, conn: Optional[sqlite3.Connection]) -> sqlite3.Connection:
+    """Reutiliza la conexión recibida o abre una nueva"""
+    return conn if conn is not None else sqlite3.connect(db_path)
+
+def _apply_pragmas(conn: sqlite3.Connection, pragmas: dict) -> None:
+    """Aplica un conjunto de PRAGMAs sobre una conexión"""
+    for name, value in pragmas.items():
+        conn.execute(f"PRAGMA {name} = {value}")
+
+def _fsync(path: str) -> None:
+    """Fuerza a disco el contenido de un archivo"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _fsync_directory(path: str) -> None:
+    """
+    Fuerza a disco las entradas de un directorio (por ejemplo, tras os.replace)
+    
+    En Windows no se pueden abrir directorios; allí se omite.
+    """
+    if os.name == "nt":
+        return
+    _fsync(path)
+
+def _create_shadow_copy(db_path: str) -> str:
+    """
+    Crea un archivo temporal junto a la base de datos destino para construir la nueva versión
+    
+    Si la base de datos ya existe se copia su contenido con la API de backup de
+    SQLite, de modo que la copia es consistente aunque haya lectores activos.
+    
+    Args:
+        db_path: Ruta a la base de datos destino
+    
+    Returns:
+        Ruta del archivo temporal
+    """
+    target = Path(db_path).resolve()
+    fd, shadow_path = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+    os.close(fd)
+    # mkstemp crea el archivo con permisos 0600; se conservan los del archivo original
+    os.chmod(shadow_path, (target.stat().st_mode & 0o777) if target.exists() else 0o644)
+
+    if target.exists():
+        source = sqlite3.connect(target)
+        shadow = sqlite3.connect(shadow_path)
+        try:
+            source.backup(shadow)
+        finally:
+            shadow.close()
+            source.close()
+
+    logger.info(f"Construyendo base de datos en archivo temporal: {shadow_path}")
+    return shadow_path
+
+def _deduplicate_existing_cards(conn: sqlite3.Connection) -> None:
+    """
+    Elimina duplicados por clave natural en bases de datos creadas antes de
+    idx_cards_natural_key, conservando la fila más reciente de cada carta
+    """
+    has_cards = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cards'"
+    ).fetchone()
+    has_key = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_cards_natural_key'"
+    ).fetchone()
+    if not has_cards or has_key:
+        return
+
+    key_columns = ", ".join(CARD_NATURAL_KEY)
+    with conn:
+        cursor = conn.execute(
+            f"""DELETE FROM cards
+                WHERE card_id NOT IN (SELECT MAX(card_id) FROM cards GROUP BY {key_columns})"""
+        )
+    if cursor.rowcount > 0:
+        logger.warning(f"Eliminadas {cursor.rowcount} cartas duplicadas por clave natural")
+
+def _read_schema_statements() -> tuple:
+    """
+    Lee schema.sql y separa las sentencias de tablas de las de índices
+
+    Returns:
+        Tupla con (sentencias_tablas, sentencias_índices). Los índices UNIQUE
+        se consideran parte de las tablas porque definen restricciones.
+    """
+    # Ruta segura del schema.sql
+    base_dir = Path(__file__).resolve().parent.parent  # raíz del proyecto
+    schema_path = base_dir / "database" / "schema.sql"
+
+    if not schema_path.exists():
+        logger.error(f"Archivo schema.sql no encontrado en: {schema_path}")
+        raise FileNotFoundError(f"schema.sql no encontrado en {schema_path}")
+
+    # Leer schema.sql sin comentarios
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        lines = [line for line in f if not line.strip().startswith('--')]
+
+    table_statements = []
+    index_statements = []
+    for statement in "".join(lines).split(';'):
+        statement = statement.strip()
+        if not statement:
+            continue
+        if statement.upper().startswith("CREATE INDEX"):
+            index_statements.append(statement)
+        else:
+            table_statements.append(statement)
+
+    return table_statements, index_statements
+
+def create_database_schema(db_path: str = "pokemon_cards.db", include_indexes: bool = True,
+                           conn: Optional[sqlite3.Connection] = None) -> None:
     """
     Crea el esquema de la base de datos SQLite
     
     Args:
         db_path: Ruta a la base de datos SQLite
+        include_indexes: Si es False, solo crea las tablas y deja los índices
+            para create_database_indexes (modo de carga masiva)
+        conn: Conexión abierta opcional; si se omite se abre una nueva
     """
     try:
-        # Ruta segura del schema.sql
-        base_dir = Path(__file__).resolve().parent.parent  # raíz del proyecto
-        schema_path = base_dir / "database" / "schema.sql"
-
-        if not schema_path.exists():
-            logger.error(f"Archivo schema.sql no encontrado en: {schema_path}")
-            raise FileNotFoundError(f"schema.sql no encontrado en {schema_path}")
-
-        # Leer schema.sql
-        with open(schema_path, 'r', encoding='utf-8') as f:
-            schema_sql = f.read()
+        table_statements, index_statements = _read_schema_statements()
+        statements = table_statements + (index_statements if include_indexes else [])
 
         # Conectar a la base de datos y ejecutar schema
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.executescript(schema_sql)
-        conn.commit()
-        conn.close()
+        connection = _connect(db_path, conn)
+        _deduplicate_existing_cards(connection)
+        connection.executescript(";\n".join(statements) + ";")
+        connection.commit()
+        if conn is None:
+            connection.close()
 
         logger.info(f"Esquema de base de datos creado en: {db_path}")
 
@@ -48,110 +231,277 @@ def create_database_schema(db_path: str = "pokemon_cards.db") -> None:
         logger.error(f"Error al crear esquema de base de datos: {str(e)}")
         raise
 
+def refresh_summary_tables(db_path: str = "pokemon_cards.db",
+                           conn: Optional[sqlite3.Connection] = None) -> None:
+    """
+    Recalcula las tablas de resumen del dashboard (ver SUMMARY_TABLES)
+    
+    Todas las tablas se reconstruyen en una sola transacción, así nunca queda
+    un resumen desactualizado respecto a otro. Las vistas con el mismo nombre
+    de versiones anteriores de la base de datos se eliminan.
+    
+    Args:
+        db_path: Ruta a la base de datos SQLite
+        conn: Conexión abierta opcional; si se omite se abre una nueva
+    """
+    try:
+        connection = _connect(db_path, conn)
+        connection.commit()
+        connection.execute("BEGIN")
+        try:
+            for name, query, index_columns in SUMMARY_TABLES:
+                existing = connection.execute(
+                    "SELECT type FROM sqlite_master WHERE name = ? AND type IN ('table', 'view')", (name,)
+                ).fetchone()
+                if existing:
+                    connection.execute(f"DROP {existing[0].upper()} {name}")
+                connection.execute(f"CREATE TABLE {name} AS {query}")
+                for column in index_columns:
+                    connection.execute(f"CREATE INDEX idx_{name}_{column} ON {name}({column})")
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        if conn is None:
+            connection.close()
+
+        logger.info(f"Actualizadas {len(SUMMARY_TABLES)} tablas de resumen en: {db_path}")
+
+    except Exception as e:
+        logger.error(f"Error al actualizar tablas de resumen: {str(e)}")
+        raise
 
-def load_expansions(df: pd.DataFrame, db_path: str = "pokemon_cards.db") -> dict:
+def create_database_indexes(db_path: str = "pokemon_cards.db",
+                            conn: Optional[sqlite3.Connection] = None) -> None:
+    """
+    Crea los índices definidos en schema.sql y actualiza las estadísticas del planificador
+    
+    Args:
+        db_path: Ruta a la base de datos SQLite
+        conn: Conexión abierta opcional; si se omite se abre una nueva
+    """
+    try:
+        _, index_statements = _read_schema_statements()
+
+        connection = _connect(db_path, conn)
+        connection.executescript(";\n".join(index_statements + ["ANALYZE"]) + ";")
+        connection.commit()
+        if conn is None:
+            connection.close()
+
+        logger.info(f"Creados {len(index_statements)} índices y ejecutado ANALYZE en: {db_path}")
+
+    except Exception as e:
+        logger.error(f"Error al crear índices: {str(e)}")
+        raise
+
+
+def load_expansions(df: pd.DataFrame, db_path: str = "pokemon_cards.db",
+                    conn: Optional[sqlite3.Connection] = None,
+                    expansion_map: Optional[dict] = None) -> dict:
     """
     Carga las expansiones a la base de datos y retorna un mapeo de IDs
     
     Args:
         df: DataFrame con datos transformados
         db_path: Ruta a la base de datos
+        conn: Conexión abierta opcional; si se omite se abre una nueva
+        expansion_map: Mapeo ya conocido (carga por bloques); solo se cargan
+            las expansiones que no estén en él
     
     Returns:
         Diccionario con mapeo nombre_expansión -> id
     """
     try:
-        conn = sqlite3.connect(db_path)
-        
-        # Obtener expansiones únicas
-        expansions = df[['expansion_name', 'generation']].drop_duplicates()
+        known = expansion_map or {}
         
-        # Cargar expansiones
-        expansion_map = {}
-        for _, row in expansions.iterrows():
-            cursor = conn.cursor()
-            cursor.execute(
+        # Obtener expansiones únicas (una fila por nombre)
+        expansions = df[['expansion_name', 'generation']].drop_duplicates(subset='expansion_name')
+        expansions_data = [row for row in expansions.itertuples(index=False, name=None) if row[0] not in known]
+        if not expansions_data:
+            return dict(known)
+
+        connection = _connect(db_path, conn)
+
+        # Cargar todas las expansiones en una sola transacción
+        with connection:
+            changes_before = connection.total_changes
+            connection.executemany(
                 "INSERT OR IGNORE INTO expansions (name, generation) VALUES (?, ?)",
-                (row['expansion_name'], row['generation'])
+                expansions_data
             )
-            conn.commit()
-            
-            # Obtener el ID insertado
-            cursor.execute("SELECT expansion_id FROM expansions WHERE name = ?", (row['expansion_name'],))
-            result = cursor.fetchone()
-            if result:
-                expansion_map[row['expansion_name']] = result[0]
-        
-        logger.info(f"Cargadas {len(expansion_map)} expansiones únicas")
-        conn.close()
-        return expansion_map
+            inserted_count = connection.total_changes - changes_before
+
+            # Construir el mapeo nombre -> id con un único JOIN contra una tabla temporal
+            connection.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_expansion_names (name TEXT PRIMARY KEY)")
+            connection.execute("DELETE FROM tmp_expansion_names")
+            connection.executemany(
+                "INSERT OR IGNORE INTO tmp_expansion_names (name) VALUES (?)",
+                ((name,) for name, _ in expansions_data)
+            )
+            cursor = connection.execute(
+                """SELECT e.name, e.expansion_id
+                   FROM expansions e
+                   JOIN tmp_expansion_names t ON t.name = e.name"""
+            )
+            loaded_map = dict(cursor.fetchall())
+            connection.execute("DROP TABLE tmp_expansion_names")
+
+        existing_count = len(expansions_data) - inserted_count
+        logger.info(
+            f"Cargadas {len(loaded_map)} expansiones únicas "
+            f"({inserted_count} nuevas, {existing_count} ya existentes)"
+        )
+        if conn is None:
+            connection.close()
+        return {**known, **loaded_map}
         
     except Exception as e:
         logger.error(f"Error al cargar expansiones: {str(e)}")
         raise
 
-def load_cards(df: pd.DataFrame, expansion_map: dict, db_path: str = "pokemon_cards.db") -> int:
+def load_cards(df: pd.DataFrame, expansion_map: dict, db_path: str = "pokemon_cards.db",
+               conn: Optional[sqlite3.Connection] = None) -> dict:
     """
-    Carga las cartas a la base de datos
+    Carga las cartas a la base de datos de forma incremental
+    
+    Las cartas se identifican por su clave natural (expansión, Pokémon, tipo y
+    número). Las nuevas se insertan, las existentes solo se actualizan si cambió
+    su precio o rareza, y las idénticas no generan escrituras.
     
     Args:
         df: DataFrame con datos transformados
         expansion_map: Diccionario de mapeo expansión -> id
         db_path: Ruta a la base de datos
+        conn: Conexión abierta opcional; si se omite se abre una nueva
     
     Returns:
-        Número de cartas cargadas
+        Diccionario con el número de cartas insertadas, actualizadas y sin cambios
     """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Preparar datos para inserción
-        cards_data = []
-        for _, row in df.iterrows():
-            expansion_id = expansion_map.get(row['expansion_name'])
-            if expansion_id:
-                cards_data.append((
-                    expansion_id,
-                    row['pokemon_name'],
-                    row['card_type'],
-                    row['card_number'],
-                    row['price'],
-                    int(row['is_rare']),
-                    row['rarity_level']
-                ))
-        
-        # Insertar en lote
+        connection = _connect(db_path, conn)
+        cursor = connection.cursor()
+
+        # Mapear expansiones a IDs de forma vectorizada
+        expansion_ids = df['expansion_name'].map(expansion_map)
+        mapped = expansion_ids.notna()
+        dropped_count = int((~mapped).sum())
+        if dropped_count > 0:
+            logger.warning(f"Descartadas {dropped_count} cartas sin expansión registrada")
+
+        # Preparar datos para inserción por columnas (sin iterrows)
+        cards_df = pd.DataFrame({
+            'expansion_id': expansion_ids[mapped].astype('int64'),
+            'pokemon_name': df.loc[mapped, 'pokemon_name'],
+            'card_type': df.loc[mapped, 'card_type'],
+            'card_number': df.loc[mapped, 'card_number'],
+            'price': df.loc[mapped, 'price'],
+            'is_rare': df.loc[mapped, 'is_rare'].astype('int64'),
+            'rarity_level': df.loc[mapped, 'rarity_level'],
+            'rarity_score': df.loc[mapped, 'rarity_score'].astype('int64')
+        })
+
+        # Una misma clave natural solo puede aparecer una vez; gana la última fila
+        duplicated = cards_df.duplicated(subset=CARD_NATURAL_KEY, keep='last')
+        duplicated_count = int(duplicated.sum())
+        if duplicated_count > 0:
+            logger.warning(f"Descartadas {duplicated_count} cartas repetidas por clave natural")
+            cards_df = cards_df[~duplicated]
+
+        # Insertar o actualizar en lote (solo se escriben filas nuevas o modificadas)
+        cards_before = cursor.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+        changes_before = connection.total_changes
+        cursor.executemany(CARDS_UPSERT_SQL, cards_df.itertuples(index=False, name=None))
+        written_count = connection.total_changes - changes_before
+        cards_after = cursor.execute("SELECT COUNT(*) FROM cards").fetchone()[0]
+        
+        connection.commit()
+        if conn is None:
+            connection.close()
+        
+        inserted_count = cards_after - cards_before
+        counts = {
+            "inserted": inserted_count,
+            "updated": written_count - inserted_count,
+            "unchanged": len(cards_df) - written_count
+        }
+        logger.info(
+            f"Cartas cargadas: {counts['inserted']} insertadas, "
+            f"{counts['updated']} actualizadas, {counts['unchanged']} sin cambios"
+        )
+        return counts
+        
+    except Exception as e:
+        logger.error(f"Error al cargar cartas: {str(e)}")
+        raise
+
+def delete_cards(df: pd.DataFrame, db_path: str = "pokemon_cards.db",
+                 conn: Optional[sqlite3.Connection] = None) -> int:
+    """
+    Elimina las cartas cuya clave natural aparece en el DataFrame
+    
+    Se usa para aplicar las bajas (tombstones) detectadas entre dos
+    extracciones sucesivas. Las claves se cargan en una tabla temporal y se
+    eliminan con un único DELETE.
+    
+    Args:
+        df: DataFrame transformado con expansion_name, pokemon_name, card_type y card_number
+        db_path: Ruta a la base de datos
+        conn: Conexión abierta opcional; si se omite se abre una nueva
+    
+    Returns:
+        Número de cartas eliminadas
+    """
+    try:
+        connection = _connect(db_path, conn)
+        cursor = connection.cursor()
+        
+        key_columns = ['expansion_name', 'pokemon_name', 'card_type', 'card_number']
+        cursor.execute(
+            """CREATE TEMP TABLE IF NOT EXISTS tmp_card_keys
+               (expansion_name TEXT, pokemon_name TEXT, card_type TEXT, card_number TEXT)"""
+        )
+        cursor.execute("DELETE FROM tmp_card_keys")
         cursor.executemany(
-            """INSERT INTO cards 
-               (expansion_id, pokemon_name, card_type, card_number, price, is_rare, rarity_level)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            cards_data
+            "INSERT INTO tmp_card_keys VALUES (?, ?, ?, ?)",
+            df[key_columns].astype(object).itertuples(index=False, name=None)
+        )
+        cursor.execute(
+            f"""DELETE FROM cards
+                WHERE ({", ".join(CARD_NATURAL_KEY)}) IN (
+                    SELECT e.expansion_id, t.pokemon_name, t.card_type, t.card_number
+                    FROM tmp_card_keys t
+                    JOIN expansions e ON e.name = t.expansion_name
+                )"""
         )
+        deleted_count = cursor.rowcount
+        cursor.execute("DROP TABLE tmp_card_keys")
         
-        conn.commit()
-        loaded_count = cursor.rowcount
-        conn.close()
+        connection.commit()
+        if conn is None:
+            connection.close()
         
-        logger.info(f"Cargadas {loaded_count} cartas a la base de datos")
-        return loaded_count
+        logger.info(f"Cartas eliminadas: {deleted_count}")
+        return deleted_count
         
     except Exception as e:
-        logger.error(f"Error al cargar cartas: {str(e)}")
+        logger.error(f"Error al eliminar cartas: {str(e)}")
         raise
 
-def verify_data_loaded(db_path: str = "pokemon_cards.db") -> dict:
+def verify_data_loaded(db_path: str = "pokemon_cards.db",
+                       conn: Optional[sqlite3.Connection] = None) -> dict:
     """
     Verifica que los datos se cargaron correctamente
     
     Args:
         db_path: Ruta a la base de datos
+        conn: Conexión abierta opcional; si se omite se abre una nueva
     
     Returns:
         Diccionario con estadísticas de verificación
     """
     try:
-        conn = sqlite3.connect(db_path)
+        connection = _connect(db_path, conn)
         
         # Consultas de verificación
         queries = {
@@ -164,11 +514,12 @@ def verify_data_loaded(db_path: str = "pokemon_cards.db") -> dict:
         
         results = {}
         for name, query in queries.items():
-            cursor = conn.cursor()
+            cursor = connection.cursor()
             cursor.execute(query)
             results[name] = cursor.fetchone()[0]
         
-        conn.close()
+        if conn is None:
+            connection.close()
         
         logger.info("=== VERIFICACIÓN DE DATOS ===")
         logger.info(f"Total cartas: {results['total_cards']}")
@@ -183,38 +534,200 @@ def verify_data_loaded(db_path: str = "pokemon_cards.db") -> dict:
         logger.error(f"Error en verificación: {str(e)}")
         raise
 
-def load_data_to_db(df: pd.DataFrame, db_path: str = "pokemon_cards.db") -> dict:
+# Sentencias de schema.sql que crean las tablas de metadatos del ETL
+METADATA_TABLE_PREFIXES = (
+    "CREATE TABLE IF NOT EXISTS ETL_METADATA",
+    "CREATE TABLE IF NOT EXISTS ETL_STAGE_METRICS",
+)
+
+def save_etl_metadata(db_path: str, status: str, duration_seconds: float,
+                      cards_loaded: Optional[int] = None, expansions_loaded: Optional[int] = None,
+                      error_message: Optional[str] = None, stage_metrics: Iterable[dict] = ()) -> Optional[int]:
+    """
+    Registra una ejecución del ETL en etl_metadata y sus etapas en etl_stage_metrics
+    
+    Se escribe sobre la base de datos en uso (después del intercambio atómico),
+    así que el historial se conserva entre cargas. Solo se crean las tablas de
+    metadatos si faltan; si la base de datos aún no existe (por ejemplo, falló
+    la primera extracción) no se crea y la ejecución no se registra.
+    
+    Args:
+        db_path: Ruta a la base de datos
+        status: 'success' o 'error'
+        duration_seconds: Duración total de la ejecución
+        cards_loaded: Cartas insertadas o actualizadas
+        expansions_loaded: Expansiones procesadas
+        error_message: Mensaje de error si la ejecución falló
+        stage_metrics: Métricas por etapa (ver run_metrics.StageMetrics.as_dict)
+    
+    Returns:
+        run_id de la ejecución registrada, o None si la base de datos no existe
+    """
+    if not os.path.exists(db_path):
+        logger.warning(f"No existe {db_path}; la ejecución ({status}) no se registra en etl_metadata")
+        return None
+    
+    try:
+        table_statements, _ = _read_schema_statements()
+        connection = sqlite3.connect(db_path)
+        try:
+            for statement in table_statements:
+                if statement.upper().startswith(METADATA_TABLE_PREFIXES):
+                    connection.execute(statement)
+            cursor = connection.execute(
+                """INSERT INTO etl_metadata
+                   (cards_loaded, expansions_loaded, duration_seconds, status, error_message)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (cards_loaded, expansions_loaded, duration_seconds, status, error_message)
+            )
+            run_id = cursor.lastrowid
+            connection.executemany(
+                """INSERT INTO etl_stage_metrics
+                   (run_id, stage, wall_seconds, cpu_seconds, peak_rss_mb, rows, rows_per_second)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                ((run_id, m["stage"], m["wall_seconds"], m["cpu_seconds"], m["peak_rss_mb"],
+                  m["rows"], m["rows_per_second"]) for m in stage_metrics)
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        
+        logger.info(f"Ejecución registrada en etl_metadata (run_id={run_id}, status={status})")
+        return run_id
+        
+    except Exception as e:
+        logger.error(f"Error al registrar metadatos del ETL: {str(e)}")
+        raise
+
+def load_data_to_db(df: Union[pd.DataFrame, Iterable[pd.DataFrame]], db_path: str = "pokemon_cards.db",
+                    bulk_mode: bool = True, atomic: bool = True,
+                    tombstones: Optional[pd.DataFrame] = None) -> dict:
     """
     Función principal para cargar datos a la base de datos
     
+    En modo de carga masiva se usa una única conexión con PRAGMAs rápidos, las
+    tablas se crean sin índices, y los índices y ANALYZE se ejecutan después de
+    insertar todas las filas. Al final se restauran los PRAGMAs seguros.
+    
+    En modo atómico la carga se hace sobre una copia temporal junto al archivo
+    destino, que solo reemplaza a la base de datos en uso (os.replace) después
+    de verificarse y escribirse a disco (fsync del archivo y, tras el
+    intercambio, del directorio). Los lectores nunca ven tablas a medio
+    cargar, y un corte de energía deja la versión anterior o la nueva completa.
+    
+    Si se recibe un iterable de DataFrames (modo streaming), cada bloque se
+    carga en cuanto llega y el mapeo de expansiones se mantiene entre bloques.
+    
+    En modo incremental (captura de cambios) df contiene solo las filas nuevas
+    o modificadas, y tombstones las cartas que desaparecieron del origen; las
+    bajas se aplican antes de insertar.
+    
     Args:
-        df: DataFrame con datos transformados
+        df: DataFrame con datos transformados, o iterable de bloques transformados
         db_path: Ruta a la base de datos
+        bulk_mode: Activa el modo de carga masiva
+        atomic: Construye la base de datos en un archivo temporal y la intercambia al final
+        tombstones: Cartas transformadas a eliminar (ver delete_cards)
     
     Returns:
         Diccionario con resultados de la carga
     """
+    build_path = db_path
     try:
         logger.info(f"Iniciando carga de datos a base de datos: {db_path}")
+        timings = {}
+        if atomic:
+            phase_start = time.perf_counter()
+            build_path = _create_shadow_copy(db_path)
+            timings["shadow_copy"] = time.perf_counter() - phase_start
+        conn = sqlite3.connect(build_path)
         
-        # 1. Crear esquema de base de datos
-        create_database_schema(db_path)
-        
-        # 2. Cargar expansiones y obtener mapeo
-        expansion_map = load_expansions(df, db_path)
+        try:
+            if bulk_mode:
+                _apply_pragmas(conn, BULK_LOAD_PRAGMAS)
+            
+            # 1. Crear esquema de base de datos
+            phase_start = time.perf_counter()
+            create_database_schema(build_path, include_indexes=not bulk_mode, conn=conn)
+            timings["schema"] = time.perf_counter() - phase_start
+            
+            chunks = [df] if isinstance(df, pd.DataFrame) else df
+            expansion_map = {}
+            cards_delta = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0}
+            
+            # Aplicar bajas antes de insertar: si una clave eliminada vuelve a
+            # aparecer en los datos nuevos, la inserción posterior la restaura
+            if tombstones is not None and len(tombstones) > 0:
+                phase_start = time.perf_counter()
+                cards_delta["deleted"] = delete_cards(tombstones, build_path, conn=conn)
+                timings["deletes"] = time.perf_counter() - phase_start
+
+            timings["expansions"] = timings["cards"] = 0.0
+            rows_received = 0
+            
+            for chunk in chunks:
+                rows_received += len(chunk)
+                
+                # 2. Cargar expansiones nuevas y actualizar el mapeo
+                phase_start = time.perf_counter()
+                expansion_map = load_expansions(chunk, build_path, conn=conn, expansion_map=expansion_map)
+                timings["expansions"] += time.perf_counter() - phase_start
+                
+                # 3. Cargar cartas
+                phase_start = time.perf_counter()
+                chunk_delta = load_cards(chunk, expansion_map, build_path, conn=conn)
+                timings["cards"] += time.perf_counter() - phase_start
+                for key, value in chunk_delta.items():
+                    cards_delta[key] += value
+            
+            # 4. Crear índices diferidos y actualizar estadísticas
+            if bulk_mode:
+                phase_start = time.perf_counter()
+                create_database_indexes(build_path, conn=conn)
+                timings["indexes"] = time.perf_counter() - phase_start
+                _apply_pragmas(conn, SAFE_PRAGMAS)
+            
+            # 5. Recalcular las tablas de resumen del dashboard
+            phase_start = time.perf_counter()
+            refresh_summary_tables(build_path, conn=conn)
+            timings["summaries"] = time.perf_counter() - phase_start
+            
+            # 6. Verificar carga
+            stage_metrics = []
+            with StageMetrics("verify", stage_metrics) as verify_stage:
+                verification_results = verify_data_loaded(build_path, conn=conn)
+                verify_stage.rows = verification_results["total_cards"]
+            timings["verify"] = verify_stage.wall_seconds
+        finally:
+            conn.close()
         
-        # 3. Cargar cartas
-        cards_loaded = load_cards(df, expansion_map, db_path)
+        # 7. Intercambiar atómicamente la base de datos verificada
+        if atomic:
+            if rows_received > 0 and not verification_results["total_cards"]:
+                raise ValueError("La base de datos temporal no contiene cartas; se cancela el intercambio")
+            phase_start = time.perf_counter()
+            # El archivo nuevo debe estar completo en disco antes del intercambio,
+            # y el intercambio en el directorio antes de darlo por hecho
+            _fsync(build_path)
+            os.replace(build_path, db_path)
+            _fsync_directory(str(Path(db_path).resolve().parent))
+            timings["swap"] = time.perf_counter() - phase_start
+            logger.info(f"Base de datos reemplazada atómicamente: {db_path}")
         
-        # 4. Verificar carga
-        verification_results = verify_data_loaded(db_path)
+        logger.info("=== TIEMPOS DE CARGA ===")
+        for phase, seconds in timings.items():
+            logger.info(f"{phase}: {seconds:.3f} s")
         
-        # 5. Agregar metadatos
+        # 8. Agregar metadatos
         metadata = {
             "timestamp": datetime.now().isoformat(),
-            "cards_loaded": cards_loaded,
+            "cards_loaded": cards_delta["inserted"] + cards_delta["updated"],
+            "cards_delta": cards_delta,
             "expansions_loaded": len(expansion_map),
-            "verification": verification_results
+            "rows_received": rows_received,
+            "verification": verification_results,
+            "timings": timings,
+            "stage_metrics": [stage.as_dict() for stage in stage_metrics]
         }
         
         logger.info("Carga de datos completada exitosamente")
@@ -222,6 +735,8 @@ def load_data_to_db(df: pd.DataFrame, db_path: str = "pokemon_cards.db") -> dict
         
     except Exception as e:
         logger.error(f"Error en carga de datos: {str(e)}")
+        if build_path != db_path and os.path.exists(build_path):
+            os.remove(build_path)
         raise
 
 if __name__ == "__main__":
@@ -3,83 +3,378 @@ Script principal del pipeline ETL para Pokémon TCG
 Ejecuta todo el proceso de Extracción, Transformación y Carga
 """
 
+import argparse
 import logging
 import sys
+from functools import partial
 from pathlib import Path
 from datetime import datetime
+from typing import List, Optional
 
 # Agregar el directorio actual al path para importar módulos
 sys.path.append(str(Path(__file__).parent))
 
+# Raíz del proyecto: los logs y la base de datos por defecto no dependen del directorio de trabajo
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+LOG_PATH = PROJECT_ROOT / "logs" / "etl_pipeline.log"
+DEFAULT_DB_PATH = str(PROJECT_ROOT / "pokemon_cards.db")
+
+# Etapas del pipeline, en orden
+ETL_STAGES = ("extract", "transform", "load")
+
+# Códigos de salida de la línea de comandos
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+
 # Configuración de logging
+LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler('logs/etl_pipeline.log'),
+        logging.FileHandler(LOG_PATH),
         logging.StreamHandler(sys.stdout)
     ]
 )
 logger = logging.getLogger(__name__)
 
-def run_etl_pipeline():
+def stream_transformed_chunks(chunk_size: int, output_format: str = "csv",
+                              partition_cols: Optional[List[str]] = None,
+                              input_path: Optional[str] = None,
+                              raw_output_path: Optional[str] = None,
+                              processed_output_path: Optional[str] = None):
+    """
+    Extrae y transforma el CSV bloque a bloque
+    
+    Cada bloque se respalda, se transforma y se guarda antes de leer el
+    siguiente, así que solo hay un bloque en memoria a la vez.
+    
+    Args:
+        chunk_size: Número de filas por bloque
+        output_format: Formato de los archivos de salida ('csv', 'parquet' o 'feather')
+        partition_cols: Columnas de partición de los datos procesados (solo parquet)
+        input_path: Ruta al archivo CSV (por defecto DEFAULT_INPUT_PATH)
+        raw_output_path: Ruta del respaldo crudo (por defecto DEFAULT_RAW_BACKUP_PATH)
+        processed_output_path: Ruta de los datos procesados (por defecto DEFAULT_PROCESSED_PATH)
+    
+    Yields:
+        DataFrames transformados, uno por bloque
+    """
+    from extraction import DEFAULT_INPUT_PATH, DEFAULT_RAW_BACKUP_PATH, extract_data_chunks, save_raw_data
+    from transformation import DEFAULT_PROCESSED_PATH, transform_data, save_transformed_data
+    
+    chunks = extract_data_chunks(input_path or DEFAULT_INPUT_PATH, chunk_size)
+    for chunk_number, df_raw in enumerate(chunks, start=1):
+        save_raw_data(df_raw, raw_output_path or DEFAULT_RAW_BACKUP_PATH,
+                      append=chunk_number > 1, output_format=output_format)
+        df_transformed = transform_data(df_raw)
+        save_transformed_data(df_transformed, processed_output_path or DEFAULT_PROCESSED_PATH,
+                              append=chunk_number > 1, output_format=output_format,
+                              partition_cols=partition_cols)
+        yield df_transformed
+
+def run_etl_pipeline(chunk_size: Optional[int] = None, pipelined_workers: Optional[int] = None,
+                     transform_workers: Optional[int] = None, output_format: str = "csv",
+                     partition_cols: Optional[List[str]] = None, input_path: Optional[str] = None,
+                     db_path: str = "pokemon_cards.db", force: bool = False,
+                     incremental: bool = True, stages: Optional[List[str]] = None,
+                     raw_output_path: Optional[str] = None, processed_output_path: Optional[str] = None):
     """
     Ejecuta el pipeline ETL completo
+    
+    Si el archivo de entrada no cambió desde la última ejecución exitosa
+    (según el manifiesto guardado junto a la base de datos) y la base de
+    datos sigue intacta, el pipeline no se vuelve a ejecutar. Si solo falta
+    la base de datos pero los datos procesados siguen intactos, se omiten
+    la extracción y la transformación.
+    
+    Con `stages` se puede ejecutar solo una parte del pipeline (etapas
+    consecutivas); las etapas omitidas al inicio se reemplazan leyendo la
+    salida que dejó la ejecución anterior (respaldo crudo o datos procesados).
+    El manifiesto y la captura de cambios solo se usan con las tres etapas.
+    
+    Args:
+        chunk_size: Si se indica, el CSV se procesa en bloques de este tamaño
+            (modo streaming) y la memoria queda acotada por el bloque
+        pipelined_workers: Si se indica, las etapas se ejecutan en paralelo
+            (lector, este número de hilos de transformación y un escritor)
+        transform_workers: Número de procesos para la transformación del
+            DataFrame completo (1 o None = un solo proceso)
+        output_format: Formato de los respaldos y datos procesados
+            ('csv', 'parquet' o 'feather')
+        partition_cols: Columnas de partición de los datos procesados
+            (solo parquet, por ejemplo ['generation'])
+        input_path: Ruta al archivo CSV (por defecto DEFAULT_INPUT_PATH)
+        db_path: Ruta a la base de datos
+        force: Ejecuta el pipeline aunque la entrada no haya cambiado
+        incremental: En el modo de DataFrame completo, compara la extracción
+            con la instantánea anterior y solo transforma y carga las filas
+            nuevas o modificadas, eliminando las que desaparecieron
+        stages: Etapas a ejecutar, subconjunto consecutivo de
+            ('extract', 'transform', 'load'); por defecto todas
+        raw_output_path: Ruta del respaldo crudo (por defecto DEFAULT_RAW_BACKUP_PATH)
+        processed_output_path: Ruta de los datos procesados (por defecto DEFAULT_PROCESSED_PATH)
     """
     start_time = datetime.now()
     logger.info("=" * 60)
     logger.info("INICIANDO PIPELINE ETL - POKÉMON TCG")
     logger.info(f"Fecha y hora: {start_time}")
     logger.info("=" * 60)
+    measured = []
     
     try:
         # Importar módulos
-        from extraction import extract_data, save_raw_data
-        from transformation import transform_data, save_transformed_data
+        from run_metrics import StageMetrics
+        from extraction import (DEFAULT_INPUT_PATH, DEFAULT_RAW_BACKUP_PATH, extract_data,
+                                read_raw_data, save_raw_data)
+        from transformation import (DEFAULT_PROCESSED_PATH, transform_data, transform_data_parallel,
+                                    transform_rows, transform_rows_parallel, finalize_transformed,
+                                    read_transformed_data, save_transformed_data)
         from load import load_data_to_db
+        from manifest import (manifest_path_for, load_manifest, save_manifest,
+                              fingerprint_input, output_unchanged)
+        from storage import output_path_for
+        from cdc import (snapshot_path_for, add_row_hashes, build_snapshot, diff_snapshots,
+                         strip_hashes, load_snapshot, save_snapshot)
         
-        # PASO 1: EXTRACCIÓN
-        logger.info("\n" + "=" * 60)
-        logger.info("PASO 1: EXTRACCIÓN DE DATOS")
-        logger.info("=" * 60)
+        input_path = input_path or DEFAULT_INPUT_PATH
+        raw_output_path = raw_output_path or DEFAULT_RAW_BACKUP_PATH
+        processed_output_path = processed_output_path or DEFAULT_PROCESSED_PATH
+        raw_path = output_path_for(raw_output_path, output_format)
+        processed_path = output_path_for(processed_output_path, output_format)
         
-        df_raw = extract_data()
-        save_raw_data(df_raw)
+        stages = validate_stages(stages)
+        full_run = stages == list(ETL_STAGES)
+        if not full_run and (chunk_size or pipelined_workers):
+            raise ValueError("Los modos por bloques y en paralelo requieren las tres etapas")
+        if chunk_size and output_format == "feather":
+            raise ValueError("El formato feather no admite escritura por bloques; use csv o parquet")
         
-        # PASO 2: TRANSFORMACIÓN
-        logger.info("\n" + "=" * 60)
-        logger.info("PASO 2: TRANSFORMACIÓN DE DATOS")
-        logger.info("=" * 60)
+        # Comprobar si la entrada cambió desde la última ejecución
+        manifest_path = manifest_path_for(db_path)
+        previous = load_manifest(manifest_path) if full_run else {}
+        input_fingerprint = fingerprint_input(input_path, previous.get("input")) if full_run else None
+        options = {"output_format": output_format, "partition_cols": partition_cols}
+        same_input = (
+            bool(previous)
+            and previous["input"]["blake2b"] == input_fingerprint["blake2b"]
+            and previous.get("options") == options
+        )
+        reuse_processed = False
         
-        df_transformed = transform_data(df_raw)
-        save_transformed_data(df_transformed)
+        if not full_run:
+            logger.info(f"Etapas seleccionadas: {', '.join(stages)}")
+        elif force:
+            logger.info("Ejecución forzada: se ignora el manifiesto")
+        elif same_input and output_unchanged(previous, "database"):
+            logger.info(f"Sin cambios en {input_path} desde {previous['completed_at']}; "
+                        "se omite el pipeline (use --force para reprocesar)")
+            return {
+                "status": "skipped",
+                "reason": "input unchanged",
+                "last_run": previous["completed_at"],
+                "timestamp": datetime.now().isoformat()
+            }
+        elif same_input and not (chunk_size or pipelined_workers) and output_unchanged(previous, "processed"):
+            reuse_processed = True
+        
+        snapshot_path = snapshot_path_for(db_path)
+        
+        def record_run(results: dict, processed_saved: bool = False, snapshot_saved: bool = False) -> dict:
+            # Los datos procesados y la instantánea solo se registran si
+            # corresponden a la base de datos que deja esta ejecución
+            outputs = {"database": db_path}
+            if processed_saved:
+                outputs["processed"] = processed_path
+            if snapshot_saved:
+                outputs["snapshot"] = snapshot_path
+            results["run_id"] = _record_run_metadata(
+                db_path, start_time, "success", measured, results,
+                cards_loaded=results["cards_loaded"], expansions_loaded=results["expansions_loaded"]
+            )
+            if full_run:
+                save_manifest(manifest_path, input_fingerprint, options, outputs)
+            return _finish_pipeline(start_time, results)
+        
+        if pipelined_workers:
+            # PASOS 1-3 EN PARALELO: lector, transformadores y escritor conectados por colas
+            from extraction import DEFAULT_CHUNK_SIZE
+            from pipelined_etl import run_pipelined_etl
+            
+            logger.info("\n" + "=" * 60)
+            logger.info(f"PASOS 1-3: ETL EN PARALELO CON {pipelined_workers} WORKERS")
+            logger.info("=" * 60)
+            
+            with StageMetrics("pipeline", measured) as stage:
+                results = run_pipelined_etl(file_path=input_path,
+                                            db_path=db_path,
+                                            chunk_size=chunk_size or DEFAULT_CHUNK_SIZE,
+                                            workers=pipelined_workers,
+                                            output_format=output_format,
+                                            partition_cols=partition_cols,
+                                            raw_output_path=raw_output_path,
+                                            processed_output_path=processed_output_path)
+                stage.rows = results["rows_received"]
+            return record_run(results)
+        
+        if chunk_size:
+            # PASOS 1-3 EN STREAMING: cada bloque se extrae, transforma y carga
+            logger.info("\n" + "=" * 60)
+            logger.info(f"PASOS 1-3: ETL EN BLOQUES DE {chunk_size} FILAS")
+            logger.info("=" * 60)
+            
+            with StageMetrics("stream", measured) as stage:
+                results = load_data_to_db(
+                    stream_transformed_chunks(chunk_size, output_format, partition_cols, input_path,
+                                              raw_output_path, processed_output_path),
+                    db_path
+                )
+                stage.rows = results["rows_received"]
+            return record_run(results)
+        
+        df_tombstones = None
+        cdc_stats = None
+        processed_saved = False
+        snapshot_saved = False
+        
+        if reuse_processed:
+            # PASOS 1-2 OMITIDOS: la entrada no cambió y los datos procesados siguen intactos
+            logger.info("\n" + "=" * 60)
+            logger.info("PASOS 1-2: SIN CAMBIOS EN LA ENTRADA, SE REUTILIZAN LOS DATOS PROCESADOS")
+            logger.info("=" * 60)
+            
+            with StageMetrics("read_processed", measured) as stage:
+                df_transformed = read_transformed_data(str(processed_path))
+                stage.rows = len(df_transformed)
+            processed_saved = True
+            snapshot_saved = output_unchanged(previous, "snapshot")
+            logger.info(f"Datos procesados leídos de: {processed_path} ({len(df_transformed)} filas)")
+        elif "transform" in stages:
+            if "extract" in stages:
+                # PASO 1: EXTRACCIÓN
+                logger.info("\n" + "=" * 60)
+                logger.info("PASO 1: EXTRACCIÓN DE DATOS")
+                logger.info("=" * 60)
+                
+                with StageMetrics("extract", measured) as stage:
+                    df_raw = extract_data(input_path)
+                    save_raw_data(df_raw, raw_output_path, output_format=output_format)
+                    stage.rows = len(df_raw)
+            else:
+                # PASO 1 OMITIDO: se parte del respaldo crudo de la ejecución anterior
+                with StageMetrics("read_raw", measured) as stage:
+                    df_raw = read_raw_data(str(raw_path))
+                    stage.rows = len(df_raw)
+                logger.info(f"Datos crudos leídos de: {raw_path} ({len(df_raw)} filas)")
+            
+            # PASO 1b: CAPTURA DE CAMBIOS respecto a la extracción anterior
+            snapshot = None
+            use_cdc = incremental and full_run
+            if use_cdc:
+                with StageMetrics("cdc", measured) as stage:
+                    df_hashed = add_row_hashes(df_raw)
+                    if not force and output_unchanged(previous, "database") \
+                            and output_unchanged(previous, "snapshot"):
+                        snapshot = load_snapshot(snapshot_path)
+                    stage.rows = len(df_raw)
+                if snapshot is None:
+                    logger.info("Sin instantánea válida de la ejecución anterior; se hará una carga completa")
+            
+            if transform_workers and transform_workers > 1:
+                row_transform = partial(transform_rows_parallel, workers=transform_workers)
+            else:
+                row_transform = transform_rows
+            
+            # PASO 2: TRANSFORMACIÓN
+            logger.info("\n" + "=" * 60)
+            logger.info("PASO 2: TRANSFORMACIÓN DE DATOS")
+            logger.info("=" * 60)
+            
+            with StageMetrics("transform", measured) as stage:
+                if snapshot is not None:
+                    # Solo se transforman las filas crudas nuevas y las ganadoras de claves modificadas
+                    df_changes, df_tombstones, cdc_stats, new_snapshot = diff_snapshots(
+                        df_hashed, snapshot, row_transform
+                    )
+                    df_transformed = finalize_transformed(df_changes)
+                    
+                    # En modo incremental solo se guardan los cambios, sin pisar el catálogo completo
+                    changes_path = Path(processed_output_path).with_name("pokemon_cards_changes.csv")
+                    save_transformed_data(df_transformed, output_path=str(changes_path),
+                                          output_format=output_format, partition_cols=partition_cols)
+                    stage.rows = cdc_stats["rows_transformed"]
+                else:
+                    if use_cdc:
+                        transformed_rows = row_transform(strip_hashes(df_hashed))
+                        new_snapshot = build_snapshot(df_hashed, transformed_rows)
+                        df_transformed = finalize_transformed(transformed_rows)
+                    elif transform_workers and transform_workers > 1:
+                        df_transformed = transform_data_parallel(df_raw, transform_workers)
+                    else:
+                        df_transformed = transform_data(df_raw)
+                    
+                    processed_saved = save_transformed_data(df_transformed, processed_output_path,
+                                                            output_format=output_format,
+                                                            partition_cols=partition_cols) is not None
+                    stage.rows = len(df_raw)
+        elif "load" in stages:
+            # PASOS 1-2 OMITIDOS: se cargan los datos procesados de la ejecución anterior
+            with StageMetrics("read_processed", measured) as stage:
+                df_transformed = read_transformed_data(str(processed_path))
+                stage.rows = len(df_transformed)
+            logger.info(f"Datos procesados leídos de: {processed_path} ({len(df_transformed)} filas)")
+        else:
+            # Solo extracción
+            logger.info("\n" + "=" * 60)
+            logger.info("PASO 1: EXTRACCIÓN DE DATOS")
+            logger.info("=" * 60)
+            
+            with StageMetrics("extract", measured) as stage:
+                df_raw = extract_data(input_path)
+                save_raw_data(df_raw, raw_output_path, output_format=output_format)
+                stage.rows = len(df_raw)
+        
+        if "load" not in stages:
+            rows = measured[-1].rows
+            results = {
+                "timestamp": datetime.now().isoformat(),
+                "cards_loaded": 0,
+                "expansions_loaded": 0,
+                "rows_received": rows,
+                "stages": stages
+            }
+            return record_run(results)
+        
+        if cdc_stats is not None and cdc_stats["rows_to_load"] == 0 and cdc_stats["deleted"] == 0:
+            # Ninguna carta cambió: la base de datos ya está al día
+            logger.info("Sin cambios en las cartas; se omite la carga")
+            results = {
+                "timestamp": datetime.now().isoformat(),
+                "cards_loaded": 0,
+                "cards_delta": {"inserted": 0, "updated": 0, "unchanged": cdc_stats["unchanged"], "deleted": 0},
+                "expansions_loaded": 0,
+                "rows_received": 0,
+                "cdc": cdc_stats
+            }
+            save_snapshot(new_snapshot, snapshot_path)
+            return record_run(results, snapshot_saved=True)
         
         # PASO 3: CARGA
         logger.info("\n" + "=" * 60)
         logger.info("PASO 3: CARGA A BASE DE DATOS")
         logger.info("=" * 60)
         
-        results = load_data_to_db(df_transformed)
+        with StageMetrics("load", measured) as stage:
+            results = load_data_to_db(df_transformed, db_path, tombstones=df_tombstones)
+            stage.rows = results["rows_received"]
         
-        # RESUMEN FINAL
-        end_time = datetime.now()
-        duration = end_time - start_time
-        
-        logger.info("\n" + "=" * 60)
-        logger.info("PIPELINE ETL COMPLETADO EXITOSAMENTE")
-        logger.info("=" * 60)
-        logger.info(f"Duración total: {duration}")
-        logger.info(f"Cartas procesadas: {results['cards_loaded']}")
-        logger.info(f"Expansiones procesadas: {results['expansions_loaded']}")
-        logger.info(f"Timestamp: {results['timestamp']}")
-        logger.info("=" * 60)
+        results["cdc"] = cdc_stats
+        if full_run and not reuse_processed and incremental:
+            save_snapshot(new_snapshot, snapshot_path)
+            snapshot_saved = True
         
-        return {
-            "status": "success",
-            "duration": str(duration),
-            "results": results,
-            "timestamp": end_time.isoformat()
-        }
+        return record_run(results, processed_saved, snapshot_saved)
         
     except Exception as e:
         logger.error("\n" + "=" * 60)
@@ -88,41 +383,271 @@ def run_etl_pipeline():
         logger.error(f"Error: {str(e)}", exc_info=True)
         logger.error("=" * 60)
         
+        _record_run_metadata(db_path, start_time, "error", measured, error_message=str(e))
+        
         return {
             "status": "error",
             "error": str(e),
             "timestamp": datetime.now().isoformat()
         }
 
-def main():
+def validate_stages(stages: Optional[List[str]]) -> List[str]:
+    """
+    Valida y ordena las etapas seleccionadas
+    
+    Args:
+        stages: Etapas pedidas (None = todas)
+    
+    Returns:
+        Lista de etapas en el orden del pipeline
+    """
+    if not stages:
+        return list(ETL_STAGES)
+    unknown = set(stages) - set(ETL_STAGES)
+    if unknown:
+        raise ValueError(f"Etapas no reconocidas: {sorted(unknown)}. Opciones: {list(ETL_STAGES)}")
+    ordered = [stage for stage in ETL_STAGES if stage in stages]
+    positions = [ETL_STAGES.index(stage) for stage in ordered]
+    if positions != list(range(positions[0], positions[-1] + 1)):
+        raise ValueError(f"Las etapas deben ser consecutivas: {', '.join(ordered)}")
+    return ordered
+
+def _record_run_metadata(db_path: str, start_time: datetime, status: str, measured: list,
+                         results: Optional[dict] = None, cards_loaded: Optional[int] = None,
+                         expansions_loaded: Optional[int] = None,
+                         error_message: Optional[str] = None) -> Optional[int]:
+    """
+    Registra la ejecución y sus etapas en etl_metadata / etl_stage_metrics
+    
+    La verificación se mide dentro de load_data_to_db; su tiempo se descuenta
+    de la etapa que la contiene para que las etapas no se solapen. En modo
+    paralelo también se registra el tiempo ocupado de cada etapa del pipeline.
+    Un fallo al registrar no cambia el resultado de la ejecución.
+    
+    Args:
+        db_path: Ruta a la base de datos
+        start_time: Momento de inicio del pipeline
+        status: 'success' o 'error'
+        measured: Etapas medidas (run_metrics.StageMetrics)
+        results: Resultados de load_data_to_db, si la carga terminó (se les
+            agregan las métricas de todas las etapas en 'stage_metrics')
+        cards_loaded: Cartas insertadas o actualizadas
+        expansions_loaded: Expansiones procesadas
+        error_message: Mensaje de error si la ejecución falló
+    
+    Returns:
+        run_id registrado, o None si no se pudo registrar
+    """
+    try:
+        from load import save_etl_metadata
+        
+        load_metrics = (results or {}).get("stage_metrics", [])
+        for metric in load_metrics:
+            if metric["stage"] == "verify" and measured:
+                measured[-1].exclude(metric)
+        stage_metrics = [stage.as_dict() for stage in measured] + load_metrics
+        
+        for name, stage in (results or {}).get("pipeline_stats", {}).get("stages", {}).items():
+            stage_metrics.append({
+                "stage": f"pipeline_{name}",
+                "wall_seconds": stage["busy_seconds"],
+                "cpu_seconds": None,
+                "peak_rss_mb": None,
+                "rows": stage["rows"],
+                "rows_per_second": stage["rows_per_second"]
+            })
+        
+        if results is not None:
+            results["stage_metrics"] = stage_metrics
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        return save_etl_metadata(db_path, status, duration, cards_loaded, expansions_loaded,
+                                 error_message, stage_metrics)
+    except Exception as e:
+        logger.warning(f"No se pudo registrar la ejecución en etl_metadata: {str(e)}")
+        return None
+
+def _finish_pipeline(start_time: datetime, results: dict) -> dict:
+    """
+    Registra el resumen final de una ejecución exitosa
+    
+    Args:
+        start_time: Momento de inicio del pipeline
+        results: Resultados de load_data_to_db
+    
+    Returns:
+        Diccionario con el estado de la ejecución
+    """
+    end_time = datetime.now()
+    duration = end_time - start_time
+    
+    logger.info("\n" + "=" * 60)
+    logger.info("PIPELINE ETL COMPLETADO EXITOSAMENTE")
+    logger.info("=" * 60)
+    logger.info(f"Duración total: {duration}")
+    logger.info(f"Cartas procesadas: {results['cards_loaded']}")
+    logger.info(f"Expansiones procesadas: {results['expansions_loaded']}")
+    if results.get("cdc"):
+        cdc = results["cdc"]
+        logger.info(f"Cambios detectados: {cdc['new']} nuevas, {cdc['changed']} modificadas, "
+                    f"{cdc['deleted']} eliminadas, {cdc['unchanged']} sin cambios")
+        logger.info(f"Filas cargadas: {cdc['rows_to_load']} de {cdc['rows_total']} "
+                    f"(cartas eliminadas: {results['cards_delta']['deleted']})")
+    logger.info(f"Timestamp: {results['timestamp']}")
+    logger.info("=" * 60)
+    
+    return {
+        "status": "success",
+        "duration": str(duration),
+        "results": results,
+        "timestamp": end_time.isoformat()
+    }
+
+def positive_int(value: str) -> int:
+    """Tipo de argparse para enteros mayores que cero"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' no es un entero")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"debe ser mayor que cero (se recibió {number})")
+    return number
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Define los argumentos de la línea de comandos
+    """
+    from extraction import DEFAULT_INPUT_PATH, DEFAULT_RAW_BACKUP_PATH
+    from transformation import DEFAULT_PROCESSED_PATH
+    from storage import OUTPUT_FORMATS
+    
+    parser = argparse.ArgumentParser(
+        description="Pipeline ETL de Pokémon TCG: extracción del CSV, transformación y carga a SQLite"
+    )
+    parser.add_argument("--input", default=DEFAULT_INPUT_PATH,
+                        help="CSV de entrada (por defecto: %(default)s)")
+    parser.add_argument("--output", default=DEFAULT_PROCESSED_PATH,
+                        help="Ruta de los datos procesados (la extensión se ajusta a --format)")
+    parser.add_argument("--raw-output", default=DEFAULT_RAW_BACKUP_PATH,
+                        help="Ruta del respaldo de los datos crudos")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH,
+                        help="Base de datos SQLite (por defecto: %(default)s)")
+    parser.add_argument("--stages", default=",".join(ETL_STAGES),
+                        help="Etapas a ejecutar, separadas por comas y consecutivas "
+                             "(por ejemplo 'transform,load'); por defecto todas")
+    parser.add_argument("--chunk-size", type=positive_int, default=None,
+                        help="Procesa el CSV en bloques de este número de filas")
+    parser.add_argument("--workers", type=positive_int, default=None,
+                        help="Con --chunk-size: hilos de transformación del pipeline en paralelo; "
+                             "sin él: procesos para transformar el DataFrame completo")
+    parser.add_argument("--format", dest="output_format", choices=sorted(OUTPUT_FORMATS), default="csv",
+                        help="Formato de los respaldos y datos procesados")
+    parser.add_argument("--partition-by", default=None,
+                        help="Columnas de partición de los datos procesados, separadas por comas (solo parquet)")
+    parser.add_argument("--force", action="store_true",
+                        help="Reprocesa aunque la entrada no haya cambiado")
+    parser.add_argument("--no-incremental", action="store_true",
+                        help="Desactiva la captura de cambios y hace una carga completa")
+    parser.add_argument("--profile", action="store_true",
+                        help="Perfila la ejecución (cProfile, tracemalloc y tiempos por función) "
+                             "y guarda un .prof y un resumen JSON")
+    parser.add_argument("--profile-dir", default=str(LOG_PATH.parent),
+                        help="Directorio de los archivos de perfil (por defecto: %(default)s)")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="No pide confirmación (necesario para ejecuciones no interactivas)")
+    return parser
+
+def _split_option(value: Optional[str]) -> Optional[List[str]]:
+    """Convierte 'a,b' en ['a', 'b']"""
+    if not value:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Función principal
+    
+    Args:
+        argv: Argumentos de la línea de comandos (por defecto sys.argv)
+    
+    Returns:
+        Código de salida: 0 si el pipeline terminó (o no había cambios),
+        1 si falló o se canceló, 2 si los argumentos no son válidos
     """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    
+    try:
+        stages = validate_stages(_split_option(args.stages))
+    except ValueError as e:
+        parser.error(str(e))
+    if args.chunk_size and stages != list(ETL_STAGES):
+        parser.error("--chunk-size requiere las tres etapas")
+    if args.chunk_size and args.output_format == "feather":
+        parser.error("--format feather no admite --chunk-size; use csv o parquet")
+    
     print("Pokémon TCG ETL Pipeline")
     print("-" * 30)
     print("Este pipeline realizará:")
-    print("1. Extracción de datos del archivo CSV")
-    print("2. Transformación y limpieza de datos")
-    print("3. Carga a base de datos SQLite")
+    steps = {
+        "extract": "Extracción de datos del archivo CSV",
+        "transform": "Transformación y limpieza de datos",
+        "load": "Carga a base de datos SQLite"
+    }
+    for number, stage in enumerate(stages, start=1):
+        print(f"{number}. {steps[stage]}")
     print("-" * 30)
     
-    response = input("¿Desea ejecutar el pipeline? (s/n): ").strip().lower()
+    if not args.yes:
+        if not sys.stdin.isatty():
+            print("Entrada no interactiva: use --yes para ejecutar sin confirmación.")
+            return EXIT_USAGE
+        response = input("¿Desea ejecutar el pipeline? (s/n): ").strip().lower()
+        if response != 's':
+            print("\nPipeline cancelado.")
+            return EXIT_FAILURE
     
-    if response == 's':
-        print("\nIniciando pipeline ETL...")
-        results = run_etl_pipeline()
-        
-        if results["status"] == "success":
-            print("\n✓ Pipeline completado exitosamente!")
-            print(f"   Duración: {results['duration']}")
-            print(f"   Cartas procesadas: {results['results']['cards_loaded']}")
-            print("   Base de datos creada: pokemon_cards.db")
-        else:
-            print("\n✗ Error en el pipeline")
-            print(f"   Error: {results['error']}")
-            print("   Revise el archivo etl_pipeline.log para más detalles")
+    print("\nIniciando pipeline ETL...")
+    pipeline_options = dict(
+        chunk_size=args.chunk_size,
+        pipelined_workers=args.workers if args.chunk_size else None,
+        transform_workers=None if args.chunk_size else args.workers,
+        output_format=args.output_format,
+        partition_cols=_split_option(args.partition_by),
+        input_path=args.input,
+        db_path=args.db,
+        force=args.force,
+        incremental=not args.no_incremental,
+        stages=stages,
+        raw_output_path=args.raw_output,
+        processed_output_path=args.output
+    )
+    
+    if args.profile:
+        from profiling import profile_pipeline
+        results, prof_path, summary_path = profile_pipeline(run_etl_pipeline, pipeline_options,
+                                                            args.profile_dir)
+        print(f"\nPerfil guardado en: {prof_path}")
+        print(f"Resumen del perfil: {summary_path}")
     else:
-        print("\nPipeline cancelado.")
+        results = run_etl_pipeline(**pipeline_options)
+    
+    if results["status"] == "skipped":
+        print("\n✓ Sin cambios en los datos de entrada; no fue necesario reprocesar")
+        print(f"   Última ejecución: {results['last_run']}")
+        return EXIT_SUCCESS
+    if results["status"] == "success":
+        print("\n✓ Pipeline completado exitosamente!")
+        print(f"   Duración: {results['duration']}")
+        if "load" in stages:
+            print(f"   Cartas procesadas: {results['results']['cards_loaded']}")
+            print(f"   Base de datos: {args.db}")
+        return EXIT_SUCCESS
+    
+    print("\n✗ Error en el pipeline")
+    print(f"   Error: {results['error']}")
+    print(f"   Revise el archivo {LOG_PATH} para más detalles")
+    return EXIT_FAILURE
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
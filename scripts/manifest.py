@@ -0,0 +1,160 @@
+"""
+Manifiesto de ejecuciones del pipeline ETL para Pokémon TCG
+Registra la huella del archivo de entrada y de las salidas para evitar
+reprocesar datos que no cambiaron
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Tamaño de bloque para calcular el hash en streaming
+HASH_BLOCK_SIZE = 1024 * 1024  # 1 MB
+
+def manifest_path_for(db_path: str) -> Path:
+    """
+    Ruta del manifiesto, guardado junto a la base de datos
+
+    Args:
+        db_path: Ruta a la base de datos
+
+    Returns:
+        Ruta del archivo JSON del manifiesto
+    """
+    return Path(f"{db_path}.manifest.json")
+
+def compute_file_hash(file_path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """
+    Calcula el hash blake2b de un archivo leyéndolo por bloques
+
+    Args:
+        file_path: Ruta al archivo
+        block_size: Tamaño de cada bloque leído
+
+    Returns:
+        Hash en hexadecimal
+    """
+    digest = hashlib.blake2b()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def fingerprint_input(file_path: str, previous: Optional[dict] = None) -> dict:
+    """
+    Calcula la huella (tamaño, fecha de modificación y hash) del archivo de entrada
+
+    Si el tamaño y la fecha coinciden con la huella anterior se reutiliza su
+    hash y el archivo no se vuelve a leer.
+
+    Args:
+        file_path: Ruta al archivo de entrada
+        previous: Huella registrada en la ejecución anterior
+
+    Returns:
+        Diccionario con path, size, mtime_ns y blake2b
+    """
+    stat = os.stat(file_path)
+    fingerprint = {
+        "path": str(Path(file_path).resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns
+    }
+    if previous and all(previous.get(key) == fingerprint[key] for key in ("path", "size", "mtime_ns")):
+        fingerprint["blake2b"] = previous["blake2b"]
+    else:
+        fingerprint["blake2b"] = compute_file_hash(file_path)
+    return fingerprint
+
+def fingerprint_output(path: str) -> Optional[dict]:
+    """
+    Huella ligera (tamaño y fecha) de una salida del pipeline
+
+    Los datasets parquet son directorios; se suman los tamaños y se toma la
+    fecha más reciente de sus archivos.
+
+    Args:
+        path: Ruta al archivo o directorio de salida
+
+    Returns:
+        Diccionario con size y mtime_ns, o None si la salida no existe
+    """
+    target = Path(path)
+    if not target.exists():
+        return None
+    if target.is_dir():
+        files = [f for f in target.rglob('*') if f.is_file()]
+        return {
+            "size": sum(f.stat().st_size for f in files),
+            "mtime_ns": max((f.stat().st_mtime_ns for f in files), default=0)
+        }
+    stat = target.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+def load_manifest(manifest_path: Path) -> dict:
+    """
+    Lee el manifiesto de la última ejecución exitosa
+
+    Args:
+        manifest_path: Ruta del manifiesto
+
+    Returns:
+        Contenido del manifiesto, o diccionario vacío si no existe o no es válido
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Manifiesto inválido, se ignora ({manifest_path}): {str(e)}")
+        return {}
+
+def save_manifest(manifest_path: Path, input_fingerprint: dict, options: dict, outputs: dict) -> None:
+    """
+    Guarda el manifiesto de forma atómica
+
+    Args:
+        manifest_path: Ruta del manifiesto
+        input_fingerprint: Huella del archivo de entrada
+        options: Opciones de la ejecución que afectan a las salidas
+        outputs: Rutas de salida por nombre (se registra su huella)
+    """
+    manifest = {
+        "completed_at": datetime.now().isoformat(),
+        "input": input_fingerprint,
+        "options": options,
+        "outputs": {
+            name: {"path": str(path), "fingerprint": fingerprint_output(path)}
+            for name, path in outputs.items()
+        }
+    }
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+    logger.info(f"Manifiesto de ejecución guardado en: {manifest_path}")
+
+def output_unchanged(manifest: dict, name: str) -> bool:
+    """
+    Indica si una salida registrada sigue existiendo sin modificaciones
+
+    Args:
+        manifest: Manifiesto de la ejecución anterior
+        name: Nombre de la salida (por ejemplo 'database')
+
+    Returns:
+        True si la huella actual coincide con la registrada
+    """
+    output = manifest.get("outputs", {}).get(name)
+    if not output or not output.get("fingerprint"):
+        return False
+    return fingerprint_output(output["path"]) == output["fingerprint"]
@@ -0,0 +1,288 @@
+"""
+Ejecución en paralelo (productor/consumidor) del pipeline ETL para Pokémon TCG
+Un hilo lector, un grupo de hilos de transformación y un único hilo escritor
+que es dueño de la conexión SQLite, comunicados por colas acotadas
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from extraction import (DEFAULT_CHUNK_SIZE, DEFAULT_INPUT_PATH, DEFAULT_RAW_BACKUP_PATH,
+                        extract_data_chunks, save_raw_data)
+from transformation import DEFAULT_PROCESSED_PATH, transform_data, save_transformed_data
+from load import load_data_to_db
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Marca de fin de datos en las colas
+_END = None
+
+# Intervalo para revisar si otra etapa falló mientras se espera en una cola
+_POLL_SECONDS = 0.1
+
+class _StageStats:
+    """Contadores de una etapa del pipeline"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.chunks = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, rows: int, seconds: float) -> None:
+        with self._lock:
+            self.rows += rows
+            self.chunks += 1
+            self.busy_seconds += seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "chunks": self.chunks,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "rows_per_second": round(self.rows / self.busy_seconds, 1) if self.busy_seconds else None
+        }
+
+class _MonitoredQueue(queue.Queue):
+    """Cola acotada que registra su profundidad en cada inserción"""
+
+    def __init__(self, name: str, maxsize: int):
+        super().__init__(maxsize)
+        self.name = name
+        self.max_depth = 0
+        self._depth_total = 0
+        self._samples = 0
+
+    def put_checked(self, item, stop: threading.Event) -> None:
+        """Inserta el elemento esperando mientras la cola está llena (contrapresión)"""
+        while True:
+            if stop.is_set():
+                raise RuntimeError("Pipeline detenido por un error en otra etapa")
+            try:
+                self.put(item, timeout=_POLL_SECONDS)
+                break
+            except queue.Full:
+                continue
+        depth = self.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._samples += 1
+
+    def get_checked(self, stop: threading.Event):
+        """Obtiene un elemento esperando mientras la cola está vacía"""
+        while True:
+            if stop.is_set():
+                raise RuntimeError("Pipeline detenido por un error en otra etapa")
+            try:
+                return self.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+    def as_dict(self) -> dict:
+        return {
+            "maxsize": self.maxsize,
+            "max_depth": self.max_depth,
+            "avg_depth": round(self._depth_total / self._samples, 2) if self._samples else 0.0
+        }
+
+class _InFlightLimit:
+    """
+    Limita los bloques leídos que aún no terminaron de cargarse y guardarse
+
+    El lector toma un cupo antes de enviar cada bloque y el cupo se libera
+    cuando el escritor y el hilo de guardado terminaron con él. Así los
+    buffers de reordenamiento de _in_order no crecen aunque un bloque lento
+    deje esperando a los siguientes.
+    """
+
+    def __init__(self, limit: int, consumers: int):
+        self._slots = threading.Semaphore(limit)
+        self._consumers = consumers
+        self._done = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: threading.Event) -> None:
+        """Espera un cupo libre, revisando si otra etapa falló"""
+        while not self._slots.acquire(timeout=_POLL_SECONDS):
+            if stop.is_set():
+                raise RuntimeError("Pipeline detenido por un error en otra etapa")
+
+    def release(self, sequence: int) -> None:
+        """Marca el bloque como terminado por un consumidor; libera el cupo con el último"""
+        with self._lock:
+            self._done[sequence] = self._done.get(sequence, 0) + 1
+            if self._done[sequence] < self._consumers:
+                return
+            del self._done[sequence]
+        self._slots.release()
+
+def _in_order(source: _MonitoredQueue, producers: int, stop: threading.Event):
+    """
+    Entrega los bloques de una cola en el orden original de lectura
+
+    Los hilos de transformación terminan en cualquier orden; los bloques que
+    llegan adelantados esperan en un buffer hasta que les toca. El buffer
+    queda acotado por el límite de bloques en proceso (_InFlightLimit).
+
+    Yields:
+        Tuplas (secuencia, bloque)
+    """
+    pending = {}
+    next_sequence = 0
+    finished = 0
+    while finished < producers:
+        item = source.get_checked(stop)
+        if item is _END:
+            finished += 1
+            continue
+        sequence, chunk = item
+        pending[sequence] = chunk
+        while next_sequence in pending:
+            yield next_sequence, pending.pop(next_sequence)
+            next_sequence += 1
+
+def run_pipelined_etl(file_path: str = DEFAULT_INPUT_PATH, db_path: str = "pokemon_cards.db",
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 2,
+                      queue_size: Optional[int] = None, output_format: str = "csv",
+                      partition_cols: Optional[List[str]] = None,
+                      raw_output_path: str = DEFAULT_RAW_BACKUP_PATH,
+                      processed_output_path: str = DEFAULT_PROCESSED_PATH) -> dict:
+    """
+    Ejecuta extracción, transformación y carga en paralelo sobre bloques del CSV
+
+    - Hilo lector: lee bloques del CSV y guarda el respaldo crudo.
+    - Grupo de transformación: `workers` hilos que ejecutan transform_data.
+    - Hilo escritor: único dueño de la conexión SQLite; carga los bloques en
+      el orden de lectura mediante load_data_to_db.
+    - Hilo de guardado: escribe los datos procesados en el orden de lectura.
+
+    Las colas están acotadas y el lector no tiene más de `queue_size` bloques
+    sin cargar y guardar, así que una etapa lenta (o un bloque lento) frena a
+    las anteriores en vez de acumular bloques en memoria.
+
+    Args:
+        file_path: Ruta al archivo CSV
+        db_path: Ruta a la base de datos
+        chunk_size: Número de filas por bloque
+        workers: Número de hilos de transformación
+        queue_size: Capacidad de cada cola y máximo de bloques en proceso
+            (por defecto 2 bloques por worker)
+        output_format: Formato de los respaldos y datos procesados
+        partition_cols: Columnas de partición de los datos procesados (solo parquet)
+        raw_output_path: Ruta del respaldo de los datos crudos
+        processed_output_path: Ruta de los datos procesados
+
+    Returns:
+        Resultados de load_data_to_db con las estadísticas del pipeline en 'pipeline_stats'
+    """
+    queue_size = queue_size or 2 * workers
+    raw_queue = _MonitoredQueue("raw", queue_size)
+    load_queue = _MonitoredQueue("load", queue_size)
+    save_queue = _MonitoredQueue("save", queue_size)
+    in_flight = _InFlightLimit(queue_size, consumers=2)
+
+    stats = {name: _StageStats(name) for name in ("extract", "transform", "load", "save")}
+    stop = threading.Event()
+    errors = []
+    results = {}
+
+    def guarded(target):
+        def run():
+            try:
+                target()
+            except Exception as e:
+                if not stop.is_set():
+                    errors.append(e)
+                    logger.error(f"Error en el hilo {threading.current_thread().name}: {str(e)}")
+                stop.set()
+        return run
+
+    def reader():
+        chunks = extract_data_chunks(file_path, chunk_size)
+        sequence = 0
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, _END)
+            if chunk is _END:
+                break
+            save_raw_data(chunk, raw_output_path, append=sequence > 0, output_format=output_format)
+            stats["extract"].add(len(chunk), time.perf_counter() - start)
+            in_flight.acquire(stop)
+            raw_queue.put_checked((sequence, chunk), stop)
+            sequence += 1
+        for _ in range(workers):
+            raw_queue.put_checked(_END, stop)
+
+    def transformer():
+        while True:
+            item = raw_queue.get_checked(stop)
+            if item is _END:
+                break
+            sequence, chunk = item
+            start = time.perf_counter()
+            transformed = transform_data(chunk)
+            stats["transform"].add(len(chunk), time.perf_counter() - start)
+            load_queue.put_checked((sequence, transformed), stop)
+            save_queue.put_checked((sequence, transformed), stop)
+        load_queue.put_checked(_END, stop)
+        save_queue.put_checked(_END, stop)
+
+    def writer():
+        def timed_chunks():
+            for sequence, chunk in _in_order(load_queue, workers, stop):
+                start = time.perf_counter()
+                yield chunk
+                stats["load"].add(len(chunk), time.perf_counter() - start)
+                in_flight.release(sequence)
+        results.update(load_data_to_db(timed_chunks(), db_path))
+
+    def saver():
+        for sequence, chunk in _in_order(save_queue, workers, stop):
+            start = time.perf_counter()
+            save_transformed_data(chunk, processed_output_path, append=sequence > 0,
+                                  output_format=output_format, partition_cols=partition_cols)
+            stats["save"].add(len(chunk), time.perf_counter() - start)
+            in_flight.release(sequence)
+
+    threads = [threading.Thread(target=guarded(reader), name="etl-reader")]
+    threads += [threading.Thread(target=guarded(transformer), name=f"etl-transform-{i}") for i in range(workers)]
+    threads += [
+        threading.Thread(target=guarded(writer), name="etl-writer"),
+        threading.Thread(target=guarded(saver), name="etl-saver")
+    ]
+
+    logger.info(f"Iniciando pipeline en paralelo: bloques de {chunk_size} filas, "
+                f"{workers} workers, colas de {queue_size} bloques")
+    start_time = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start_time
+
+    if errors:
+        raise errors[0]
+
+    pipeline_stats = {
+        "elapsed_seconds": round(elapsed, 3),
+        "stages": {name: stage.as_dict() for name, stage in stats.items()},
+        "queues": {q.name: q.as_dict() for q in (raw_queue, load_queue, save_queue)}
+    }
+
+    logger.info("=== ESTADÍSTICAS DEL PIPELINE ===")
+    logger.info(f"Tiempo total: {elapsed:.3f} s")
+    for name, stage in pipeline_stats["stages"].items():
+        logger.info(f"Etapa {name}: {stage['rows']} filas en {stage['chunks']} bloques, "
+                    f"{stage['busy_seconds']} s ocupada, {stage['rows_per_second']} filas/s")
+    for name, depth in pipeline_stats["queues"].items():
+        logger.info(f"Cola {name}: profundidad máxima {depth['max_depth']}/{depth['maxsize']}, "
+                    f"promedio {depth['avg_depth']}")
+
+    results["pipeline_stats"] = pipeline_stats
+    return results
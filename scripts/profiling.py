@@ -0,0 +1,257 @@
+"""
+Perfilado de ejecuciones del pipeline ETL para Pokémon TCG
+Combina cProfile, tracemalloc y temporizadores por función (reloj y CPU)
+"""
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Funciones del pipeline que se miden (módulo, función)
+PROFILED_FUNCTIONS = [
+    ("extraction", "extract_data"),
+    ("extraction", "extract_data_chunks"),
+    ("extraction", "save_raw_data"),
+    ("cdc", "add_row_hashes"),
+    ("cdc", "build_snapshot"),
+    ("cdc", "diff_snapshots"),
+    ("transformation", "transform_data"),
+    ("transformation", "transform_data_parallel"),
+    ("transformation", "clean_price_column"),
+    ("transformation", "extract_card_number_info"),
+    ("transformation", "parse_card_numbers"),
+    ("transformation", "assign_rarity_levels"),
+    ("transformation", "save_transformed_data"),
+    ("load", "load_data_to_db"),
+    ("load", "load_expansions"),
+    ("load", "load_cards"),
+    ("load", "delete_cards"),
+    ("load", "create_database_indexes"),
+    ("load", "refresh_summary_tables"),
+    ("load", "verify_data_loaded"),
+]
+
+# Módulos que pueden tener referencias importadas a las funciones medidas
+_PIPELINE_MODULES = ("extraction", "transformation", "load", "cdc", "storage", "pipelined_etl", "main_etl")
+
+# Número de asignaciones de memoria y de funciones de cProfile en el resumen
+TOP_ALLOCATIONS = 10
+TOP_FUNCTIONS = 25
+
+class FunctionTimers:
+    """Acumula llamadas, tiempo de reloj y tiempo de CPU por función"""
+
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                wall = time.perf_counter() - wall_start
+                cpu = time.thread_time() - cpu_start
+                with self._lock:
+                    entry = self.stats.setdefault(
+                        name, {"calls": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "max_wall_seconds": 0.0}
+                    )
+                    entry["calls"] += 1
+                    entry["wall_seconds"] += wall
+                    entry["cpu_seconds"] += cpu
+                    entry["max_wall_seconds"] = max(entry["max_wall_seconds"], wall)
+        return timed
+
+    def as_dict(self) -> dict:
+        return {
+            name: {key: round(value, 4) if isinstance(value, float) else value for key, value in entry.items()}
+            for name, entry in sorted(self.stats.items(), key=lambda item: -item[1]["wall_seconds"])
+        }
+
+def _install_timers(timers: FunctionTimers) -> list:
+    """
+    Reemplaza las funciones medidas por versiones con temporizador
+
+    Además del atributo del módulo de origen se reemplazan las referencias
+    importadas con `from módulo import función` en los demás módulos del
+    pipeline (por ejemplo pipelined_etl).
+
+    Returns:
+        Lista de (módulo, nombre, original) para restaurar después
+    """
+    import importlib
+
+    patched = []
+    for module_name, func_name in PROFILED_FUNCTIONS:
+        module = importlib.import_module(module_name)
+        original = getattr(module, func_name, None)
+        if original is None:
+            continue
+        wrapped = timers.wrap(f"{module_name}.{func_name}", original)
+        for holder_name in _PIPELINE_MODULES:
+            holder = sys.modules.get(holder_name)
+            if holder is not None and getattr(holder, func_name, None) is original:
+                setattr(holder, func_name, wrapped)
+                patched.append((holder, func_name, original))
+    return patched
+
+def _restore(patched: list) -> None:
+    for holder, func_name, original in reversed(patched):
+        setattr(holder, func_name, original)
+
+def _top_functions(profiler: cProfile.Profile) -> list:
+    """Funciones con mayor tiempo acumulado según cProfile"""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, func_name), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{Path(filename).name}:{line}({func_name})",
+            "calls": ncalls,
+            "self_seconds": round(tottime, 4),
+            "cumulative_seconds": round(cumtime, 4)
+        })
+    rows.sort(key=lambda row: -row["cumulative_seconds"])
+    return rows[:TOP_FUNCTIONS]
+
+def _top_allocations(snapshot: tracemalloc.Snapshot) -> list:
+    """Líneas de código con más memoria asignada al final de la ejecución"""
+    return [
+        {
+            "location": f"{Path(stat.traceback[0].filename).name}:{stat.traceback[0].lineno}",
+            "size_mb": round(stat.size / (1024 * 1024), 3),
+            "count": stat.count
+        }
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]
+    ]
+
+def profile_pipeline(func: Callable, kwargs: dict, output_dir: str, label: str = "etl_profile") -> tuple:
+    """
+    Ejecuta una función del pipeline con perfilado completo
+
+    - cProfile: estadísticas por función (solo del hilo principal; en el modo
+      en paralelo las etapas de los hilos se ven en los temporizadores).
+    - tracemalloc: memoria máxima y principales asignaciones.
+    - Temporizadores de reloj y CPU para las funciones de PROFILED_FUNCTIONS.
+
+    Genera `<label>_<fecha>.prof` (abrible con pstats o snakeviz) y
+    `<label>_<fecha>.json` con un resumen comparable entre ejecuciones
+    (ver compare_profiles).
+
+    Args:
+        func: Función a perfilar (por ejemplo run_etl_pipeline)
+        kwargs: Argumentos de la función
+        output_dir: Directorio donde guardar los archivos
+        label: Prefijo de los archivos
+
+    Returns:
+        Tupla (resultado de la función, ruta del .prof, ruta del .json)
+    """
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    prof_path = output / f"{label}_{stamp}.prof"
+    json_path = output / f"{label}_{stamp}.json"
+
+    timers = FunctionTimers()
+    patched = _install_timers(timers)
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        result = profiler.runcall(func, **kwargs)
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        current_memory, peak_memory = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        _restore(patched)
+
+    profiler.dump_stats(str(prof_path))
+
+    summary = {
+        "timestamp": datetime.now().isoformat(),
+        "function": getattr(func, "__name__", str(func)),
+        "arguments": {key: str(value) for key, value in kwargs.items()},
+        "status": result.get("status") if isinstance(result, dict) else None,
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4),
+        "memory": {
+            "peak_mb": round(peak_memory / (1024 * 1024), 3),
+            "current_mb": round(current_memory / (1024 * 1024), 3),
+            "top_allocations": _top_allocations(snapshot)
+        },
+        "functions": timers.as_dict(),
+        "stages": (result.get("results") or {}).get("stage_metrics", []) if isinstance(result, dict) else [],
+        "cprofile_top": _top_functions(profiler)
+    }
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    logger.info("=== PERFIL DE LA EJECUCIÓN ===")
+    logger.info(f"Tiempo total: {summary['wall_seconds']} s (CPU {summary['cpu_seconds']} s), "
+                f"memoria máxima (tracemalloc): {summary['memory']['peak_mb']} MB")
+    for name, entry in summary["functions"].items():
+        logger.info(f"{name}: {entry['calls']} llamadas, {entry['wall_seconds']} s reloj, "
+                    f"{entry['cpu_seconds']} s CPU")
+    logger.info(f"Perfil guardado en: {prof_path} y {json_path}")
+
+    return result, prof_path, json_path
+
+def compare_profiles(baseline_path: str, current_path: str) -> dict:
+    """
+    Compara dos resúmenes JSON de profile_pipeline
+
+    Args:
+        baseline_path: Resumen de referencia
+        current_path: Resumen a comparar
+
+    Returns:
+        Diccionario función -> (segundos base, segundos actuales, cambio relativo)
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(current_path, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+
+    def ratio(before: Optional[float], after: Optional[float]) -> Optional[float]:
+        return round(after / before - 1, 3) if before and after is not None else None
+
+    comparison = {"total": (baseline["wall_seconds"], current["wall_seconds"],
+                            ratio(baseline["wall_seconds"], current["wall_seconds"])),
+                  "peak_memory_mb": (baseline["memory"]["peak_mb"], current["memory"]["peak_mb"],
+                                     ratio(baseline["memory"]["peak_mb"], current["memory"]["peak_mb"]))}
+    for name in sorted(set(baseline["functions"]) | set(current["functions"])):
+        before = baseline["functions"].get(name, {}).get("wall_seconds")
+        after = current["functions"].get(name, {}).get("wall_seconds")
+        comparison[name] = (before, after, ratio(before, after))
+    return comparison
+
+if __name__ == "__main__":
+    # Uso: python profiling.py base.json actual.json
+    if len(sys.argv) != 3:
+        print("Uso: python profiling.py <perfil_base.json> <perfil_actual.json>")
+        sys.exit(2)
+    print(f"{'Función':<45} {'Base (s)':>10} {'Actual (s)':>11} {'Cambio':>8}")
+    for name, (before, after, change) in compare_profiles(sys.argv[1], sys.argv[2]).items():
+        change_text = f"{change:+.1%}" if change is not None else "-"
+        print(f"{name:<45} {before if before is not None else '-':>10} "
+              f"{after if after is not None else '-':>11} {change_text:>8}")
@@ -0,0 +1,153 @@
+"""
+Métricas de ejecución del pipeline ETL para Pokémon TCG
+Mide tiempo de reloj, tiempo de CPU y memoria máxima de cada etapa
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+
+def cpu_seconds() -> float:
+    """
+    Tiempo de CPU (usuario + sistema) del proceso y de sus hijos ya terminados
+
+    Incluye a los procesos de transform_data_parallel una vez que finalizan.
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+# Estado de memoria del proceso en Linux (VmHWM = memoria residente máxima)
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+# Etapas abiertas (una etapa puede contener otra, por ejemplo load y verify).
+# VmHWM es del proceso, así que la lista es compartida por todos los hilos
+# (modo en paralelo) y se protege con un lock: leer, propagar y reiniciar el
+# máximo debe ser una sola operación
+_active_stages = []
+_active_stages_lock = threading.Lock()
+
+def _children_peak_kb() -> int:
+    """Memoria residente máxima del mayor proceso hijo terminado, en KB (0 si no se puede medir)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        # ru_maxrss está en bytes en macOS y en KB en Linux
+        return peak // 1024 if sys.platform == "darwin" else peak
+    except ImportError:
+        return 0
+
+def _read_hwm_kb() -> Optional[int]:
+    """VmHWM del proceso en KB, o None fuera de Linux"""
+    try:
+        with open(PROC_STATUS, 'r') as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _reset_hwm() -> bool:
+    """Reinicia VmHWM a la memoria residente actual (Linux 4.0+); False si no se puede"""
+    try:
+        with open(PROC_CLEAR_REFS, 'w') as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Memoria residente máxima acumulada del proceso (o de su mayor hijo) en MB
+
+    Es el máximo desde el inicio del proceso (ru_maxrss), así que nunca
+    baja; StageMetrics mide el máximo de cada etapa cuando puede. Usa el
+    módulo resource cuando está disponible (Linux/macOS); si no, psutil
+    (memoria residente actual). Sin ninguno de los dos devuelve None.
+    """
+    try:
+        import resource
+        peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        # ru_maxrss está en bytes en macOS y en KB en Linux
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    except ImportError:
+        return None
+
+class StageMetrics:
+    """
+    Mide una etapa del pipeline como context manager
+
+    Al salir (también si la etapa falla) se agrega a la lista `collector`.
+    El número de filas se asigna dentro del bloque con `stage.rows = ...`.
+
+    peak_rss_mb es la memoria residente máxima durante la etapa: en Linux
+    se reinicia VmHWM al entrar y se lee al salir (las etapas anidadas
+    conservan el máximo de la etapa que las contiene), y se incluye un
+    proceso hijo si superó durante la etapa el máximo de los hijos
+    anteriores. Donde no se puede reiniciar, es el máximo acumulado del
+    proceso (ver peak_rss_mb).
+    """
+
+    def __init__(self, name: str, collector: List["StageMetrics"]):
+        self.name = name
+        self.rows = None
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.peak_rss_mb = None
+        self._collector = collector
+        self._peak_kb = 0
+
+    def __enter__(self) -> "StageMetrics":
+        # El reinicio borra el máximo de las etapas abiertas (en este u otros hilos); se les guarda antes
+        with _active_stages_lock:
+            current = _read_hwm_kb()
+            for stage in _active_stages:
+                stage._peak_kb = max(stage._peak_kb, current or 0)
+            self._per_stage = current is not None and _reset_hwm()
+            self._children_start = _children_peak_kb()
+            _active_stages.append(self)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = cpu_seconds()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        self.wall_seconds = time.perf_counter() - self._wall_start
+        self.cpu_seconds = cpu_seconds() - self._cpu_start
+        with _active_stages_lock:
+            _active_stages.remove(self)
+            current = _read_hwm_kb()
+        if self._per_stage:
+            peak_kb = max(self._peak_kb, current or 0)
+            children_kb = _children_peak_kb()
+            if children_kb > self._children_start:
+                peak_kb = max(peak_kb, children_kb)
+            self.peak_rss_mb = round(peak_kb / 1024, 1)
+        else:
+            self.peak_rss_mb = peak_rss_mb()
+        self._collector.append(self)
+        return False
+
+    def exclude(self, other: dict) -> None:
+        """Descuenta el tiempo de una subetapa medida por separado (por ejemplo verify)"""
+        self.wall_seconds -= other["wall_seconds"] or 0.0
+        self.cpu_seconds -= other["cpu_seconds"] or 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "peak_rss_mb": self.peak_rss_mb,
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / self.wall_seconds, 1)
+            if self.rows and self.wall_seconds else None
+        }
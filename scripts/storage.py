@@ -0,0 +1,147 @@
+"""
+Módulo de almacenamiento de DataFrames para Pokémon TCG
+Escribe y lee los datos intermedios en CSV, Parquet o Arrow IPC (Feather)
+"""
+
+import pandas as pd
+import logging
+import shutil
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Formatos soportados y su extensión
+OUTPUT_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather"
+}
+
+def _require_pyarrow(output_format: str) -> None:
+    """Verifica que pyarrow esté instalado para los formatos columnares"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ImportError(f"El formato '{output_format}' requiere pyarrow (pip install pyarrow)")
+
+def output_path_for(output_path: str, output_format: str) -> Path:
+    """
+    Ajusta la extensión de la ruta de salida al formato elegido
+
+    Args:
+        output_path: Ruta de salida (por ejemplo ../data/processed/pokemon_cards_clean.csv)
+        output_format: 'csv', 'parquet' o 'feather'
+
+    Returns:
+        Ruta con la extensión del formato
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato no soportado: {output_format}. Opciones: {list(OUTPUT_FORMATS)}")
+    return Path(output_path).with_suffix(OUTPUT_FORMATS[output_format])
+
+def write_dataframe(df: pd.DataFrame, output_path: str, output_format: str = "csv",
+                    partition_cols: Optional[List[str]] = None, append: bool = False) -> Path:
+    """
+    Escribe un DataFrame en el formato elegido
+
+    - csv: un archivo de texto; append agrega filas al final.
+    - parquet: un dataset (directorio) con codificación por diccionario y,
+      opcionalmente, particionado por columnas (por ejemplo generation);
+      append agrega un archivo más al dataset.
+    - feather: un archivo Arrow IPC sin comprimir, que puede abrirse con
+      memory-map; no admite append.
+
+    Args:
+        df: DataFrame a guardar
+        output_path: Ruta de salida (la extensión se ajusta al formato)
+        output_format: 'csv', 'parquet' o 'feather'
+        partition_cols: Columnas de partición (solo parquet)
+        append: Agrega los datos a la salida existente (modo streaming)
+
+    Returns:
+        Ruta final escrita
+    """
+    path = output_path_for(output_path, output_format)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if partition_cols and output_format != "parquet":
+        raise ValueError("Las particiones solo están soportadas en formato parquet")
+
+    if output_format == "csv":
+        df.to_csv(path, index=False, encoding='utf-8',
+                  mode='a' if append else 'w', header=not (append and path.exists()))
+        return path
+
+    _require_pyarrow(output_format)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.feather as feather
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if output_format == "parquet":
+        if not append:
+            if path.is_dir():
+                shutil.rmtree(path)
+            elif path.exists():
+                path.unlink()
+        pq.write_to_dataset(
+            table,
+            root_path=str(path),
+            partition_cols=partition_cols,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            use_dictionary=True
+        )
+        return path
+
+    if append:
+        raise ValueError("El formato feather no admite escritura incremental; use csv o parquet")
+    feather.write_feather(table, str(path), compression="uncompressed")
+    return path
+
+def read_dataframe(input_path: str, columns: Optional[List[str]] = None,
+                   dtypes: Optional[dict] = None) -> pd.DataFrame:
+    """
+    Lee un DataFrame guardado con write_dataframe, detectando el formato por la extensión
+
+    Los formatos columnares se abren con memory-map, así que no se vuelve a
+    analizar texto y se conservan los tipos (incluidas las categorías). El
+    CSV no guarda tipos: sin `dtypes` se vuelven a inferir (por ejemplo, un
+    número de carta '001' se leería como 1).
+
+    Args:
+        input_path: Ruta al archivo o dataset
+        columns: Columnas a leer (por defecto, todas)
+        dtypes: Esquema columna -> tipo; se aplica a las columnas presentes
+            (ver extraction.RAW_BACKUP_DTYPES y transformation.PROCESSED_DTYPES)
+
+    Returns:
+        DataFrame con los datos
+    """
+    path = Path(input_path)
+    suffix = path.suffix.lower()
+
+    if suffix == OUTPUT_FORMATS["csv"]:
+        return pd.read_csv(path, usecols=columns, dtype=dtypes, encoding='utf-8')
+
+    if suffix == OUTPUT_FORMATS["parquet"]:
+        _require_pyarrow("parquet")
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(str(path), format="parquet", partitioning="hive")
+        df = dataset.to_table(columns=columns).to_pandas()
+    elif suffix == OUTPUT_FORMATS["feather"]:
+        _require_pyarrow("feather")
+        import pyarrow.feather as feather
+        df = feather.read_table(str(path), columns=columns, memory_map=True).to_pandas()
+    else:
+        raise ValueError(f"Formato no reconocido para: {input_path}")
+
+    # Las columnas de partición vuelven como categorías sin orden; se ajustan al esquema
+    for column, dtype in (dtypes or {}).items():
+        if column in df.columns and df[column].dtype != dtype:
+            df[column] = df[column].astype(dtype)
+    return df
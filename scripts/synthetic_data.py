@@ -0,0 +1,180 @@
+"""
+Generador de catálogos sintéticos de Pokémon TCG
+Produce CSVs del tamaño que se necesite (100k a 50M filas) con las mismas
+distribuciones que data/raw/pokemon_cards.csv, para pruebas de escala
+"""
+
+import argparse
+import logging
+import math
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Configuración de logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# CSV real del que se toman las distribuciones
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SOURCE_CSV = PROJECT_ROOT / "data" / "raw" / "pokemon_cards.csv"
+
+# Tamaños estándar de los benchmarks
+STANDARD_SIZES = (100_000, 1_000_000, 10_000_000, 50_000_000)
+
+# Filas generadas y escritas por bloque (acota la memoria del generador)
+GENERATION_CHUNK_SIZE = 1_000_000
+
+DEFAULT_SEED = 20240501
+
+def load_source_profile(source_csv: str = str(SOURCE_CSV)) -> dict:
+    """
+    Lee el CSV real y prepara las distribuciones a muestrear
+
+    Generation, Card Number, Card Type y Price se muestrean juntos (filas
+    reales completas), así se conservan los formatos "NNN OF MMM" de cada
+    expansión y la relación entre tipo de carta y precio. Los nombres de
+    Pokémon se muestrean aparte con su frecuencia real.
+
+    Args:
+        source_csv: Ruta al CSV real
+
+    Returns:
+        Diccionario con las filas modelo y la distribución de nombres
+    """
+    source = pd.read_csv(source_csv, dtype=str, encoding='utf-8').dropna(
+        subset=['Pokemon', 'Card Type', 'Generation', 'Card Number']
+    )
+    price_column = 'Price' if 'Price' in source.columns else 'Price Ł'
+    prices = pd.to_numeric(source[price_column].str.replace('Ł', '', regex=False), errors='coerce')
+    source = source[prices.notna()].reset_index(drop=True)
+    prices = prices[prices.notna()].reset_index(drop=True)
+
+    pokemon_counts = source['Pokemon'].value_counts()
+    generation_codes, generations = pd.factorize(source['Generation'])
+    card_type_codes, card_types = pd.factorize(source['Card Type'])
+    card_number_codes, card_numbers = pd.factorize(source['Card Number'])
+
+    return {
+        "rows": len(source),
+        "generation_codes": generation_codes,
+        "generations": np.asarray(generations, dtype=object),
+        "card_type_codes": card_type_codes,
+        "card_types": np.asarray(card_types, dtype=object),
+        "card_number_codes": card_number_codes,
+        "card_numbers": np.asarray(card_numbers, dtype=object),
+        "prices": prices.to_numpy(),
+        "pokemon_names": pokemon_counts.index.to_numpy(dtype=object),
+        "pokemon_weights": (pokemon_counts / pokemon_counts.sum()).to_numpy()
+    }
+
+def generate_chunk(profile: dict, rows: int, replicas: int, rng: np.random.Generator,
+                   price_suffix: bool = True) -> pd.DataFrame:
+    """
+    Genera un bloque de filas sintéticas
+
+    Cada fila toma una fila real como modelo (expansión, número, tipo y
+    precio) y un Pokémon al azar. Para que los catálogos grandes no sean el
+    mismo catálogo repetido, la expansión se reparte en `replicas` copias
+    ("AQUAPOLIS", "AQUAPOLIS 002", ...); los nombres siguen conteniendo el
+    texto original, así que la generación detectada no cambia.
+
+    Args:
+        profile: Distribuciones de load_source_profile
+        rows: Número de filas del bloque
+        replicas: Número de copias de cada expansión
+        rng: Generador aleatorio (determinista con la semilla)
+        price_suffix: Escribe los precios con el sufijo 'Ł' (por ejemplo '2.95Ł')
+
+    Returns:
+        DataFrame con las columnas del CSV crudo
+    """
+    template = rng.integers(0, profile["rows"], size=rows)
+    replica = rng.integers(0, replicas, size=rows)
+    pokemon = rng.choice(len(profile["pokemon_names"]), size=rows, p=profile["pokemon_weights"])
+
+    # Nombres de expansión: vocabulario (expansión, réplica) construido una sola vez
+    generations = profile["generations"]
+    if replicas > 1:
+        suffixes = np.array([""] + [f" {number:03d}" for number in range(2, replicas + 1)], dtype=object)
+        expansion_names = (generations[:, None] + suffixes[None, :]).ravel()
+        expansion_codes = profile["generation_codes"][template] * replicas + replica
+        generation = pd.Categorical.from_codes(expansion_codes, categories=expansion_names)
+    else:
+        generation = pd.Categorical.from_codes(profile["generation_codes"][template], categories=generations)
+
+    prices = pd.Series(profile["prices"][template]).map('{:.2f}'.format)
+    if price_suffix:
+        prices = prices + 'Ł'
+
+    return pd.DataFrame({
+        'Pokemon': pd.Categorical.from_codes(pokemon, categories=profile["pokemon_names"]),
+        'Card Type': pd.Categorical.from_codes(profile["card_type_codes"][template], categories=profile["card_types"]),
+        'Generation': generation,
+        'Card Number': pd.Categorical.from_codes(profile["card_number_codes"][template],
+                                                 categories=profile["card_numbers"]),
+        'Price': prices
+    })
+
+def generate_catalog(rows: int, output_path: str, seed: int = DEFAULT_SEED,
+                     source_csv: str = str(SOURCE_CSV), chunk_size: int = GENERATION_CHUNK_SIZE,
+                     price_suffix: bool = True, profile: Optional[dict] = None) -> Path:
+    """
+    Escribe un CSV sintético de `rows` filas, bloque a bloque
+
+    La salida es determinista: la misma semilla, tamaño y tamaño de bloque
+    producen el mismo archivo.
+
+    Args:
+        rows: Número de filas
+        output_path: Ruta del CSV a generar
+        seed: Semilla del generador aleatorio
+        source_csv: CSV real del que se toman las distribuciones
+        chunk_size: Filas por bloque de escritura
+        price_suffix: Escribe los precios con el sufijo 'Ł'
+        profile: Distribuciones ya cargadas (para generar varios tamaños)
+
+    Returns:
+        Ruta del archivo generado
+    """
+    profile = profile or load_source_profile(source_csv)
+    replicas = max(1, math.ceil(rows / profile["rows"]))
+    path = Path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    chunks = math.ceil(rows / chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+    logger.info(f"Generando {rows} filas sintéticas en {path} ({chunks} bloques, {replicas} réplicas por expansión)")
+
+    for number, chunk_seed in enumerate(seeds):
+        chunk_rows = min(chunk_size, rows - number * chunk_size)
+        chunk = generate_chunk(profile, chunk_rows, replicas, np.random.default_rng(chunk_seed), price_suffix)
+        chunk.to_csv(path, index=False, encoding='utf-8', mode='a' if number else 'w', header=number == 0)
+
+    logger.info(f"Catálogo sintético generado: {path} ({path.stat().st_size / (1024 * 1024):.1f} MB)")
+    return path
+
+def size_label(rows: int) -> str:
+    """100000 -> '100k', 1000000 -> '1M'"""
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera catálogos sintéticos de Pokémon TCG")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(STANDARD_SIZES),
+                        help="Tamaños a generar (por defecto: %(default)s)")
+    parser.add_argument("--output-dir", default=str(PROJECT_ROOT / "data" / "synthetic"),
+                        help="Directorio de salida")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--plain-prices", action="store_true", help="Precios sin el sufijo 'Ł'")
+    args = parser.parse_args()
+
+    source_profile = load_source_profile()
+    for size in args.rows:
+        generate_catalog(size, str(Path(args.output_dir) / f"pokemon_cards_{size_label(size)}.csv"),
+                         seed=args.seed, price_suffix=not args.plain_prices, profile=source_profile)
@@ -6,14 +6,53 @@ Limpia y transforma los datos extraídos
 import pandas as pd
 import numpy as np
 import logging
-from typing import Tuple
+from typing import Callable, List, Optional, Tuple
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from storage import read_dataframe, write_dataframe
+
 # Configuración de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Salida de los datos transformados (relativa a la raíz del proyecto)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_PROCESSED_PATH = str(PROJECT_ROOT / "data" / "processed" / "pokemon_cards_clean.csv")
+
+# Patrón del número de carta: "001 OF 147", "H12 OF 32", ...
+CARD_NUMBER_PATTERN = r'(\d+|[A-Z]\d+)\s*OF\s*(\d+)'
+
+# Niveles de rareza ordenados de menor a mayor
+RARITY_LEVELS = [
+    "Common", "Common Holo", "Uncommon", "Uncommon Holo",
+    "Rare", "Holofoil Rare", "Secret Rare", "Ultra Rare"
+]
+
+# Categorías de precio ordenadas de menor a mayor y sus límites inferiores
+PRICE_CATEGORIES = [
+    "Basic (<1)", "Very Low (1-5)", "Low (5-10)",
+    "Medium (10-20)", "High (20-50)", "Very High (>50)"
+]
+PRICE_BINS = [-np.inf, 1, 5, 10, 20, 50, np.inf]
+
+# Tipos de las columnas que produce transform_data; se usan al volver a leer los datos procesados
+PROCESSED_DTYPES = {
+    'pokemon_name': 'str',
+    'card_type': 'category',
+    'generation': 'category',
+    'expansion_name': 'category',
+    'card_number': 'str',
+    'set_total': 'str',
+    'price': 'float64',
+    'rarity_level': pd.CategoricalDtype(RARITY_LEVELS, ordered=True),
+    'rarity_score': 'int64',
+    'is_rare': 'bool',
+    'price_category': pd.CategoricalDtype(PRICE_CATEGORIES, ordered=True)
+}
+
 def clean_price_column(df: pd.DataFrame) -> pd.DataFrame:
     """
     Limpia la columna de precio, manejando el símbolo 'Ł' y valores inválidos
@@ -35,17 +74,19 @@ def clean_price_column(df: pd.DataFrame) -> pd.DataFrame:
         logger.error("No se encontró la columna 'Price' o 'Price Ł'")
         return df_clean
     
-    # Convertir a string y limpiar
-    df_clean['Price'] = df_clean['Price'].astype(str)
-    
-    # Remover el símbolo 'Ł' si existe
-    df_clean['Price'] = df_clean['Price'].str.replace('Ł', '', regex=False)
-    
-    # Remover espacios en blanco
-    df_clean['Price'] = df_clean['Price'].str.strip()
-    
-    # Convertir a numérico, manejando errores
-    df_clean['Price'] = pd.to_numeric(df_clean['Price'], errors='coerce')
+    # La extracción tipada ya entrega el precio como float; solo se limpia si llega como texto
+    if not pd.api.types.is_numeric_dtype(df_clean['Price']):
+        # Convertir a string y limpiar
+        df_clean['Price'] = df_clean['Price'].astype(str)
+        
+        # Remover el símbolo 'Ł' si existe
+        df_clean['Price'] = df_clean['Price'].str.replace('Ł', '', regex=False)
+        
+        # Remover espacios en blanco
+        df_clean['Price'] = df_clean['Price'].str.strip()
+        
+        # Convertir a numérico, manejando errores
+        df_clean['Price'] = pd.to_numeric(df_clean['Price'], errors='coerce')
     
     # Eliminar filas con precios inválidos o negativos
     initial_count = len(df_clean)
@@ -61,6 +102,60 @@ def clean_price_column(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_clean
 
+def map_unique_values(values: pd.Series, func: Callable, outputs: int) -> List[pd.Categorical]:
+    """
+    Aplica una función escalar solo a los valores distintos de una serie
+    
+    La serie se factoriza, func se ejecuta una vez por valor único y los
+    resultados se reparten a todas las filas mediante los códigos enteros.
+    
+    Args:
+        values: Serie de entrada (puede contener nulos)
+        func: Función que recibe un valor y retorna una tupla de resultados
+        outputs: Número de elementos de la tupla retornada por func
+    
+    Returns:
+        Lista de Categoricals, uno por cada elemento de la tupla retornada por func
+    """
+    codes, uniques = pd.factorize(values)
+    results = [func(value) for value in uniques]
+    
+    # factorize asigna el código -1 a los nulos; su resultado va al final de la lista
+    if (codes == -1).any():
+        results.append(func(np.nan))
+    
+    # Serie vacía (bloque vacío o todas las filas descartadas): sin valores que mapear
+    if not results:
+        return [pd.Categorical([]) for _ in range(outputs)]
+    
+    columns = []
+    for labels in zip(*results):
+        label_codes, categories = pd.factorize(pd.Index(labels))
+        columns.append(pd.Categorical.from_codes(label_codes[codes], categories=categories))
+    return columns
+
+def apply_text_operation(values: pd.Series, operation: Callable) -> pd.Series:
+    """
+    Aplica una operación de texto vectorizada, solo sobre las categorías si la serie es categórica
+    
+    Args:
+        values: Serie de texto u object, o serie categórica
+        operation: Función vectorizada sobre una Serie o Index de texto
+            (por ejemplo lambda text: text.str.strip().str.upper())
+    
+    Returns:
+        Serie transformada; categórica si la entrada lo era
+    """
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return operation(values)
+    
+    # Varias categorías pueden colapsar en el mismo valor tras la operación
+    new_labels = operation(values.cat.categories)
+    label_codes, categories = pd.factorize(new_labels)
+    codes = values.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, label_codes[codes], -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=categories), index=values.index)
+
 def extract_expansion_info(expansion_text: str) -> Tuple[str, str]:
     """
     Extrae información de la expansión y generación
@@ -120,7 +215,7 @@ def extract_card_number_info(card_number_text: str) -> Tuple[str, str, int]:
     card_text = str(card_number_text).strip()
     
     # Extraer número de carta y total
-    match = re.search(r'(\d+|[A-Z]\d+)\s*OF\s*(\d+)', card_text.upper())
+    match = re.search(CARD_NUMBER_PATTERN, card_text.upper())
     if match:
         card_num = match.group(1)
         total_num = match.group(2)
@@ -143,6 +238,43 @@ def extract_card_number_info(card_number_text: str) -> Tuple[str, str, int]:
     
     return card_num, total_num, rarity_score
 
+def parse_card_numbers(card_numbers: pd.Series) -> pd.DataFrame:
+    """
+    Versión vectorizada de extract_card_number_info para una columna completa
+    
+    Args:
+        card_numbers: Serie con la columna Card Number
+    
+    Returns:
+        DataFrame con las columnas card_number, set_total y rarity_score
+    """
+    missing = card_numbers.isna()
+    card_text = card_numbers.astype(str).str.strip().str.upper()
+    
+    # Una sola pasada de regex para todas las filas
+    parts = card_text.str.extract(CARD_NUMBER_PATTERN)
+    card_num = parts[0].fillna("000")
+    total_num = parts[1].fillna("147")  # Valor por defecto
+    
+    # Valores nulos: mismos valores que la versión por fila
+    card_num[missing] = "000"
+    total_num[missing] = "000"
+    
+    # Determinar rareza con máscaras booleanas
+    special = card_num.str.contains('H|SH|AR', regex=True)
+    small_set = total_num.astype('int64') <= 100
+    rarity_score = np.select(
+        [missing.to_numpy(), special.to_numpy(), small_set.to_numpy()],
+        [0, 3, 2],
+        default=1
+    )
+    
+    return pd.DataFrame({
+        'card_number': card_num,
+        'set_total': total_num,
+        'rarity_score': rarity_score
+    }, index=card_numbers.index)
+
 def calculate_rarity_level(price: float, rarity_score: int) -> str:
     """
     Calcula el nivel de rareza basado en precio y score
@@ -174,23 +306,94 @@ def calculate_rarity_level(price: float, rarity_score: int) -> str:
         else:
             return "Common"
 
-def transform_data(df: pd.DataFrame) -> pd.DataFrame:
+def assign_rarity_levels(price: pd.Series, rarity_score: pd.Series) -> pd.Categorical:
     """
-    Transforma y limpia los datos
+    Versión vectorizada de calculate_rarity_level
     
     Args:
-        df: DataFrame con datos extraídos
+        price: Serie de precios
+        rarity_score: Serie de scores de rareza
     
     Returns:
-        DataFrame transformado
+        Categorical ordenado con las categorías de RARITY_LEVELS
     """
-    logger.info("Iniciando transformación de datos...")
+    price = price.to_numpy()
+    rarity_score = rarity_score.to_numpy()
+    
+    # Mismas reglas que calculate_rarity_level, en el mismo orden de evaluación
+    conditions = [
+        price >= 50,
+        price >= 20,
+        (price >= 10) & (rarity_score >= 2),
+        price >= 10,
+        (price >= 5) & (rarity_score >= 2),
+        price >= 5,
+        rarity_score >= 3
+    ]
+    choices = [
+        "Ultra Rare", "Secret Rare", "Holofoil Rare", "Rare",
+        "Uncommon Holo", "Uncommon", "Common Holo"
+    ]
+    codes = np.select(
+        conditions,
+        [RARITY_LEVELS.index(level) for level in choices],
+        default=RARITY_LEVELS.index("Common")
+    )
+    return pd.Categorical.from_codes(codes, categories=RARITY_LEVELS, ordered=True)
+
+def categorize_price(price: float) -> str:
+    """
+    Asigna la categoría de precio de una carta
     
-    # Hacer una copia para no modificar el original
-    df_transformed = df.copy()
+    Args:
+        price: Precio de la carta
+    
+    Returns:
+        Categoría de precio como string
+    """
+    if price >= 50:
+        return "Very High (>50)"
+    elif price >= 20:
+        return "High (20-50)"
+    elif price >= 10:
+        return "Medium (10-20)"
+    elif price >= 5:
+        return "Low (5-10)"
+    elif price >= 1:
+        return "Very Low (1-5)"
+    else:
+        return "Basic (<1)"
+
+def assign_price_categories(price: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de categorize_price
+    
+    Args:
+        price: Serie de precios
+    
+    Returns:
+        Serie categórica ordenada con las categorías de PRICE_CATEGORIES
+    """
+    # pd.cut deja fuera el límite superior (inf); se acota para que inf sea "Very High (>50)"
+    # como en categorize_price
+    finite_max = np.nextafter(np.inf, 0)
+    return pd.cut(price.clip(upper=finite_max), bins=PRICE_BINS, labels=PRICE_CATEGORIES,
+                  right=False, ordered=True)
+
+def transform_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica los pasos de transformación que dependen solo de cada fila
     
-    # 1. Limpiar precios
-    df_transformed = clean_price_column(df_transformed)
+    No elimina duplicados, así que puede ejecutarse por particiones en paralelo.
+    
+    Args:
+        df: DataFrame con datos extraídos
+    
+    Returns:
+        DataFrame transformado (sin deduplicar)
+    """
+    # 1. Limpiar precios (clean_price_column trabaja sobre una copia, el original no se modifica)
+    df_transformed = clean_price_column(df)
     
     # 2. Renombrar columnas para consistencia
     df_transformed = df_transformed.rename(columns={
@@ -204,46 +407,34 @@ def transform_data(df: pd.DataFrame) -> pd.DataFrame:
     df_transformed['pokemon_name'] = df_transformed['pokemon_name'].str.strip().str.title()
     
     # 4. Limpiar tipos de carta
-    df_transformed['card_type'] = df_transformed['card_type'].str.strip().str.upper()
+    df_transformed['card_type'] = apply_text_operation(
+        df_transformed['card_type'], lambda text: text.str.strip().str.upper()
+    )
     
     # 5. Extraer información de expansión
     logger.info("Extrayendo información de expansión...")
-    expansion_info = df_transformed['expansion_raw'].apply(extract_expansion_info)
-    df_transformed['generation'] = expansion_info.apply(lambda x: x[0])
-    df_transformed['expansion_name'] = expansion_info.apply(lambda x: x[1])
+    generation, expansion_name = map_unique_values(df_transformed['expansion_raw'], extract_expansion_info, outputs=2)
+    df_transformed['generation'] = generation
+    df_transformed['expansion_name'] = expansion_name
     
     # 6. Extraer información del número de carta
     logger.info("Extrayendo información del número de carta...")
-    card_number_info = df_transformed['card_number_raw'].apply(extract_card_number_info)
-    df_transformed['card_number'] = card_number_info.apply(lambda x: x[0])
-    df_transformed['set_total'] = card_number_info.apply(lambda x: x[1])
-    df_transformed['rarity_score'] = card_number_info.apply(lambda x: x[2])
+    card_number_info = parse_card_numbers(df_transformed['card_number_raw'])
+    df_transformed['card_number'] = card_number_info['card_number']
+    df_transformed['set_total'] = card_number_info['set_total']
+    df_transformed['rarity_score'] = card_number_info['rarity_score']
     
     # 7. Calcular nivel de rareza
     logger.info("Calculando niveles de rareza...")
-    df_transformed['rarity_level'] = df_transformed.apply(
-        lambda row: calculate_rarity_level(row['Price'], row['rarity_score']), axis=1
+    df_transformed['rarity_level'] = assign_rarity_levels(
+        df_transformed['Price'], df_transformed['rarity_score']
     )
     
     # 8. Marcar cartas raras (precio > 10)
     df_transformed['is_rare'] = df_transformed['Price'] > 10
     
     # 9. Crear categorías de precio
-    def categorize_price(price):
-        if price >= 50:
-            return "Very High (>50)"
-        elif price >= 20:
-            return "High (20-50)"
-        elif price >= 10:
-            return "Medium (10-20)"
-        elif price >= 5:
-            return "Low (5-10)"
-        elif price >= 1:
-            return "Very Low (1-5)"
-        else:
-            return "Basic (<1)"
-    
-    df_transformed['price_category'] = df_transformed['Price'].apply(categorize_price)
+    df_transformed['price_category'] = assign_price_categories(df_transformed['Price'])
     
     # 10. Seleccionar y ordenar columnas finales
     final_columns = [
@@ -252,8 +443,18 @@ def transform_data(df: pd.DataFrame) -> pd.DataFrame:
         'is_rare', 'price_category'
     ]
     
-    df_transformed = df_transformed[final_columns].rename(columns={'Price': 'price'})
+    return df_transformed[final_columns].rename(columns={'Price': 'price'})
+
+def finalize_transformed(df_transformed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pasos globales de la transformación: eliminación de duplicados y estadísticas
+    
+    Args:
+        df_transformed: Resultado de transform_rows (de una o varias particiones)
     
+    Returns:
+        DataFrame transformado final
+    """
     # 11. Eliminar duplicados
     initial_count = len(df_transformed)
     df_transformed = df_transformed.drop_duplicates()
@@ -272,21 +473,104 @@ def transform_data(df: pd.DataFrame) -> pd.DataFrame:
     
     return df_transformed
 
-def save_transformed_data(df: pd.DataFrame, output_path: str = "../data/processed/pokemon_cards_clean.csv"):
+def transform_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Transforma y limpia los datos
+    
+    Args:
+        df: DataFrame con datos extraídos
+    
+    Returns:
+        DataFrame transformado
+    """
+    logger.info("Iniciando transformación de datos...")
+    return finalize_transformed(transform_rows(df))
+
+def transform_rows_parallel(df: pd.DataFrame, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Ejecuta transform_rows repartiendo las filas entre varios procesos
+    
+    Cada proceso transforma un rango contiguo de filas; el resultado
+    conserva el índice original y no está deduplicado.
+    
+    Args:
+        df: DataFrame con datos extraídos
+        workers: Número de procesos (por defecto, número de CPUs)
+    
+    Returns:
+        DataFrame transformado (sin deduplicar), equivalente al de transform_rows
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(df) < 2 * workers:
+        return transform_rows(df)
+    
+    logger.info(f"Iniciando transformación de datos en {workers} procesos...")
+    
+    bounds = np.linspace(0, len(df), workers + 1, dtype=int)
+    partitions = [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(transform_rows, partitions))
+    
+    df_transformed = pd.concat(results)
+    
+    # Cada partición tiene sus propias categorías; se unifican tras concatenar
+    for column in ('card_type', 'generation', 'expansion_name'):
+        df_transformed[column] = df_transformed[column].astype('category')
+    
+    return df_transformed
+
+def transform_data_parallel(df: pd.DataFrame, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Transforma los datos repartiendo las filas entre varios procesos
+    
+    La eliminación de duplicados se hace una sola vez sobre el resultado
+    unido de transform_rows_parallel.
+    
+    Args:
+        df: DataFrame con datos extraídos
+        workers: Número de procesos (por defecto, número de CPUs)
+    
+    Returns:
+        DataFrame transformado, equivalente al de transform_data
+    """
+    return finalize_transformed(transform_rows_parallel(df, workers))
+
+def read_transformed_data(input_path: str = DEFAULT_PROCESSED_PATH) -> pd.DataFrame:
+    """
+    Lee los datos guardados con save_transformed_data con los tipos de transform_data
+    
+    Args:
+        input_path: Ruta de los datos procesados (csv, parquet o feather)
+    
+    Returns:
+        DataFrame con los tipos de PROCESSED_DTYPES
+    """
+    return read_dataframe(input_path, dtypes=PROCESSED_DTYPES)
+
+def save_transformed_data(df: pd.DataFrame, output_path: str = DEFAULT_PROCESSED_PATH,
+                          append: bool = False, output_format: str = "csv",
+                          partition_cols: Optional[List[str]] = None) -> Optional[Path]:
     """
     Guarda los datos transformados
     
     Args:
         df: DataFrame transformado
         output_path: Ruta donde guardar los datos limpios
+        append: Agrega las filas al final del archivo (modo streaming)
+        output_format: 'csv', 'parquet' o 'feather' (ver storage.write_dataframe)
+        partition_cols: Columnas de partición para parquet (por ejemplo ['generation'])
+    
+    Returns:
+        Ruta escrita, o None si no se pudo guardar
     """
     try:
-        path = Path(output_path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        df.to_csv(output_path, index=False, encoding='utf-8')
-        logger.info(f"Datos transformados guardados en: {output_path}")
+        path = write_dataframe(df, output_path, output_format, partition_cols, append)
+        logger.info(f"Datos transformados guardados en: {path}")
+        return path
     except Exception as e:
         logger.error(f"Error al guardar datos transformados: {str(e)}")
+        return None
 
 if __name__ == "__main__":
     # Para pruebas